@@ -3,9 +3,22 @@
 import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import DOMAIN, CONF_IP_ADDRESS, CONF_REFRESH_TOKEN, CONF_API_KEY
-from .utils import discover_device_id_from_statsd, MyloWebsocketClient
+from .const import (
+    DOMAIN,
+    CONF_IP_ADDRESS,
+    CONF_REFRESH_TOKEN,
+    CONF_API_KEY,
+    CONF_METRIC_INTERVALS,
+)
+from .coordinator import MyloStatsdCoordinator
+from .utils import (
+    async_discover_device_id_from_statsd,
+    MyloSnapshotDownloader,
+    MyloTokenManager,
+    MyloWebsocketClient,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,16 +40,37 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     refresh = entry.data[CONF_REFRESH_TOKEN]
     api_key = entry.data[CONF_API_KEY]
 
+    # All outbound HTTP shares Home Assistant's pooled session, and every
+    # consumer shares one cached JWT for this entry
+    session = async_get_clientsession(hass)
+    tokens = MyloTokenManager(refresh, api_key, session)
+    hass.data[DOMAIN].setdefault("tokens", {})[entry.entry_id] = tokens
+
     # Discover the unique MYLO device id via the StatsD service
     try:
-        device_id = await hass.async_add_executor_job(
-            discover_device_id_from_statsd, ip
-        )
+        device_id = await async_discover_device_id_from_statsd(ip)
         _LOGGER.debug("Discovered device id %s", device_id)
         if device_id:
-            ws = MyloWebsocketClient(hass, device_id, refresh, api_key)
+            downloader = MyloSnapshotDownloader(
+                device_id, refresh, api_key, session=session, tokens=tokens
+            )
+            ws = MyloWebsocketClient(
+                hass,
+                device_id,
+                refresh,
+                api_key,
+                session=session,
+                tokens=tokens,
+                downloader=downloader,
+            )
             hass.data[DOMAIN].setdefault("ws", {})[entry.entry_id] = ws
+            hass.data[DOMAIN].setdefault("snapshots", {})[entry.entry_id] = downloader
             hass.data[DOMAIN].setdefault("device_ids", {})[entry.entry_id] = device_id
+            hass.data[DOMAIN].setdefault("coordinators", {})[entry.entry_id] = (
+                MyloStatsdCoordinator(
+                    hass, ip, device_id, entry.options.get(CONF_METRIC_INTERVALS)
+                )
+            )
             _LOGGER.debug("Starting websocket for %s", device_id)
             await ws.start()
         else:
@@ -49,9 +83,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await hass.config_entries.async_forward_entry_setups(
         entry, ["sensor", "camera", "button", "number", "binary_sensor"]
     )
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    _LOGGER.debug("Reloading entry %s after options update", entry.entry_id)
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.debug("Unloading entry %s", entry.entry_id)
@@ -62,10 +103,19 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
         if "cameras" in hass.data[DOMAIN]:
             hass.data[DOMAIN]["cameras"].pop(entry.entry_id, None)
+        coordinator = (
+            hass.data[DOMAIN].get("coordinators", {}).pop(entry.entry_id, None)
+        )
+        if coordinator:
+            await coordinator.async_shutdown()
         ws = hass.data[DOMAIN].get("ws", {}).pop(entry.entry_id, None)
         if ws:
             device_id = hass.data[DOMAIN].get("device_ids", {}).get(entry.entry_id)
             _LOGGER.debug("Stopping websocket for %s", device_id)
             await ws.stop()
         hass.data[DOMAIN].get("device_ids", {}).pop(entry.entry_id, None)
+        hass.data[DOMAIN].get("snapshots", {}).pop(entry.entry_id, None)
+        tokens = hass.data[DOMAIN].get("tokens", {}).pop(entry.entry_id, None)
+        if tokens:
+            tokens.stop()
     return unload_ok
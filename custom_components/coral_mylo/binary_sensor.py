@@ -4,7 +4,7 @@ import logging
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
 
-from .utils import discover_device_id_from_statsd
+from .utils import async_discover_device_id_from_statsd
 from .const import CONF_IP_ADDRESS, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
@@ -16,9 +16,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     ip = entry.data[CONF_IP_ADDRESS]
     device_id = hass.data.get(DOMAIN, {}).get("device_ids", {}).get(entry.entry_id)
     if not device_id:
-        device_id = await hass.async_add_executor_job(
-            discover_device_id_from_statsd, ip
-        )
+        device_id = await async_discover_device_id_from_statsd(ip)
         if not device_id:
             _LOGGER.error("Could not discover device ID for binary sensors")
             return
@@ -29,10 +27,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     if ws:
         health_path = f"/pooldevices/{device_id}/status/health"
-        health = MyloHealthBinarySensor(device_id, health_path)
-        entities.append(health)
-        ws.register_sensor(health_path, health.update_from_ws)
-        _LOGGER.debug("Registered realtime sensor for %s", health_path)
+        entities.append(MyloHealthBinarySensor(device_id, health_path, ws))
 
     async_add_entities(entities)
 
@@ -40,9 +35,10 @@ async def async_setup_entry(hass, entry, async_add_entities):
 class MyloHealthBinarySensor(BinarySensorEntity):
     """Device health reported via websocket."""
 
-    def __init__(self, device_id, path):
+    def __init__(self, device_id, path, ws=None):
         self._device_id = device_id
         self._path = path
+        self._ws = ws
         self._state = False
         self._attr_name = "Mylo Health"
         uid = path.replace("/", "_").strip("_")
@@ -55,6 +51,13 @@ class MyloHealthBinarySensor(BinarySensorEntity):
             "name": f"MYLO {device_id}",
         }
 
+    async def async_added_to_hass(self):
+        """Subscribe to the health path while the entity exists."""
+        await super().async_added_to_hass()
+        if self._ws:
+            self.async_on_remove(self._ws.subscribe(self._path, self.update_from_ws))
+            _LOGGER.debug("Registered realtime sensor for %s", self._path)
+
     async def update_from_ws(self, value):
         _LOGGER.debug("Health sensor %s received %s", self._path, value)
         cause = hint = None
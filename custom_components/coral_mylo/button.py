@@ -3,11 +3,8 @@
 import logging
 from homeassistant.components.button import ButtonEntity
 
-from .const import CONF_IP_ADDRESS, CONF_REFRESH_TOKEN, CONF_API_KEY, DOMAIN
-from .utils import (
-    discover_device_id_from_statsd,
-    download_latest_snapshot,
-)
+from .const import CONF_IP_ADDRESS, DOMAIN
+from .utils import async_discover_device_id_from_statsd
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -16,16 +13,12 @@ async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the snapshot refresh button for a config entry."""
     _LOGGER.debug("Setting up button for entry %s", entry.entry_id)
     ip = entry.data[CONF_IP_ADDRESS]
-    refresh_token = entry.data[CONF_REFRESH_TOKEN]
-    api_key = entry.data[CONF_API_KEY]
 
     # Use cached device id if available
     device_id = hass.data.get(DOMAIN, {}).get("device_ids", {}).get(entry.entry_id)
     if not device_id:
         try:
-            device_id = await hass.async_add_executor_job(
-                discover_device_id_from_statsd, ip
-            )
+            device_id = await async_discover_device_id_from_statsd(ip)
             if not device_id:
                 _LOGGER.error("Could not discover device ID for button")
                 return
@@ -40,17 +33,13 @@ async def async_setup_entry(hass, entry, async_add_entities):
     ws = hass.data.get(DOMAIN, {}).get("ws", {}).get(entry.entry_id)
     camera = hass.data.get(DOMAIN, {}).get("cameras", {}).get(entry.entry_id)
 
-    async_add_entities(
-        [MyloSnapshotRefreshButton(refresh_token, api_key, device_id, camera, ws)]
-    )
+    async_add_entities([MyloSnapshotRefreshButton(device_id, camera, ws)])
 
 
 class MyloSnapshotRefreshButton(ButtonEntity):
     """Button to trigger MYLO to capture a new snapshot."""
 
-    def __init__(self, refresh_token, api_key, device_id, camera, ws):
-        self._refresh_token = refresh_token
-        self._api_key = api_key
+    def __init__(self, device_id, camera, ws):
         self._device_id = device_id
         self._camera = camera
         self._ws = ws
@@ -73,17 +62,13 @@ class MyloSnapshotRefreshButton(ButtonEntity):
             _LOGGER.error("WebSocket not available for MYLO refresh")
             return
 
-        success = await self._ws.send_getimage()
-        if not success:
-            _LOGGER.error("MYLO did not report new image ready")
+        # Joins a capture already started by the camera timer or another press
+        image = await self._ws.async_capture()
+        if not image:
             return
-        _LOGGER.debug("MYLO %s reported new image", self._device_id)
 
         if not self._camera:
             _LOGGER.debug("Camera entity not available to update image")
             return
 
-        image = await download_latest_snapshot(
-            self._device_id, self._refresh_token, self._api_key
-        )
         self._camera.update_image(image)
@@ -1,23 +1,40 @@
 """MYLO camera entity implementation."""
 
+import asyncio
 import logging
+import time
+from aiohttp import web
 from homeassistant.components.camera import Camera
+from homeassistant.components.camera.img_util import JPEG_QUALITY, TurboJPEGSingleton
+from .image_pipeline import SnapshotVariantCache
+from .snapshot_store import SnapshotRing, SnapshotStore
 from .utils import (
-    discover_device_id_from_statsd,
-    download_latest_snapshot,
+    async_discover_device_id_from_statsd,
+    MyloSnapshotDownloader,
+    snapshot_digest,
 )
 from datetime import timedelta
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.event import async_track_time_interval
 from .const import (
     CONF_IP_ADDRESS,
     CONF_REFRESH_TOKEN,
     CONF_API_KEY,
+    CONF_IMGREADY_DEBOUNCE,
     DOMAIN,
+    DEFAULT_IMGREADY_DEBOUNCE,
     DEFAULT_REFRESH_INTERVAL,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Timelapse playback speed for streams that replay history
+TIMELAPSE_FRAME_INTERVAL = 0.2
+MJPEG_BOUNDARY = "frameboundary"
+# How often an idle live stream checks whether its client is still there
+MJPEG_IDLE_TIMEOUT = 10
+
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up the camera entity for a config entry."""
@@ -29,9 +46,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     device_id = hass.data.get(DOMAIN, {}).get("device_ids", {}).get(entry.entry_id)
     if not device_id:
         try:
-            device_id = await hass.async_add_executor_job(
-                discover_device_id_from_statsd, ip
-            )
+            device_id = await async_discover_device_id_from_statsd(ip)
             if not device_id:
                 _LOGGER.error("Could not discover device ID from StatsD")
                 return
@@ -45,7 +60,27 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     ws = hass.data.get(DOMAIN, {}).get("ws", {}).get(entry.entry_id)
 
-    camera = MyloCamera(ip, refresh_token, api_key, device_id, ws)
+    downloader = hass.data.get(DOMAIN, {}).get("snapshots", {}).get(entry.entry_id)
+    if downloader is None:
+        tokens = hass.data.get(DOMAIN, {}).get("tokens", {}).get(entry.entry_id)
+        downloader = MyloSnapshotDownloader(
+            device_id,
+            refresh_token,
+            api_key,
+            session=async_get_clientsession(hass),
+            tokens=tokens,
+        )
+        hass.data.setdefault(DOMAIN, {}).setdefault("snapshots", {})[entry.entry_id] = (
+            downloader
+        )
+    store = SnapshotStore(hass.config.path(DOMAIN, device_id))
+    try:
+        await hass.async_add_executor_job(store.open)
+    except Exception as e:
+        _LOGGER.error("Error opening snapshot archive: %s", e)
+        store = None
+
+    camera = MyloCamera(ip, device_id, ws, downloader, store)
     async_add_entities([camera])
     _LOGGER.debug("Camera entity created for MYLO %s", device_id)
 
@@ -53,28 +88,87 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     if ws:
 
-        async def _update(_):
+        async def _download():
+            if ws.snapshot_is_current():
+                # A capture already fetched the image this push announced
+                _LOGGER.debug("Snapshot for MYLO %s already downloaded", device_id)
+                return
+            image = await ws.async_download_snapshot()
+            camera.update_image(image)
+
+        # A burst of pushes, e.g. on every reconnect, settles into one download
+        debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=entry.options.get(
+                CONF_IMGREADY_DEBOUNCE, DEFAULT_IMGREADY_DEBOUNCE
+            ),
+            immediate=False,
+            function=_download,
+        )
+        entry.async_on_unload(debouncer.async_cancel)
+        last_payload = None
+
+        async def _update(payload):
             """Callback invoked when a new image is ready."""
+            nonlocal last_payload
+            if payload == last_payload:
+                _LOGGER.debug("Ignoring repeated imgready from MYLO %s", device_id)
+                return
+            last_payload = payload
             _LOGGER.debug("Image ready notification received from MYLO %s", device_id)
-            image = await download_latest_snapshot(device_id, refresh_token, api_key)
-            camera.update_image(image)
+            await debouncer.async_call()
+
+        entry.async_on_unload(
+            ws.subscribe(f"/pooldevices/{device_id}/imgready", _update)
+        )
+
+
+def _scale_snapshot(image, factor):
+    """Downscale a JPEG by a libjpeg-turbo scaling factor."""
+    turbo_jpeg = TurboJPEGSingleton.instance()
+    if not turbo_jpeg:
+        return image
+    return turbo_jpeg.scale_with_quality(
+        image, scaling_factor=factor, quality=JPEG_QUALITY
+    )
+
 
-        ws.register_sensor(f"/pooldevices/{device_id}/imgready", _update)
+def _mjpeg_part_header(length):
+    """Return the multipart header preceding a JPEG of ``length`` bytes."""
+    return (
+        f"--{MJPEG_BOUNDARY}\r\n"
+        "Content-Type: image/jpeg\r\n"
+        f"Content-Length: {length}\r\n\r\n"
+    ).encode()
+
+
+def _is_closing(request):
+    """Return whether the client behind ``request`` has gone away."""
+    transport = getattr(request, "transport", None)
+    return transport is None or transport.is_closing()
 
 
 class MyloCamera(Camera):
     """Camera entity that serves the latest snapshot from MYLO."""
 
-    def __init__(self, ip, refresh_token, api_key, device_id, ws):
+    def __init__(self, ip, device_id, ws, downloader, store=None):
         super().__init__()
         self._ip = ip
-        self._refresh_token = refresh_token
-        self._api_key = api_key
         self._device_id = device_id
         self._ws = ws
+        self._downloader = downloader
+        self._store = store
+        self._archive_task = None
         self._refresh_interval = DEFAULT_REFRESH_INTERVAL
         self._unsub = None
-        self._image = None
+        self._image_digest = None
+        self._variants = SnapshotVariantCache(_scale_snapshot)
+        # Recent frames, the current one included, live in a fixed-size
+        # memory map; the camera keeps no bytes copy of its own
+        self._ring = SnapshotRing()
+        self._frame_event = asyncio.Event()
+        self._closed = False
 
         self._attr_name = f"Mylo Camera {device_id}"
         self._attr_unique_id = f"mylo_camera_{device_id}"
@@ -93,8 +187,17 @@ class MyloCamera(Camera):
 
     async def async_will_remove_from_hass(self):
         """Clean up refresh task when entity is removed."""
+        # End live MJPEG streams before their frames go away
+        self._closed = True
+        self._frame_event.set()
         if self._unsub:
             self._unsub()
+        if self._archive_task:
+            await self._archive_task
+        if self._store is not None:
+            await self.hass.async_add_executor_job(self._store.close)
+        self._variants.set_source(None)
+        self._ring.close()
         await super().async_will_remove_from_hass()
 
     async def _start_timer(self):
@@ -120,31 +223,152 @@ class MyloCamera(Camera):
         if not self._ws:
             _LOGGER.error("WebSocket not available for MYLO refresh")
             return
-        success = await self._ws.send_getimage()
-        if not success:
-            _LOGGER.error("MYLO did not report new image ready")
-            return
-        image = await download_latest_snapshot(
-            self._device_id, self._refresh_token, self._api_key
-        )
+        image = await self._ws.async_capture()
         self.update_image(image)
 
-    async def async_camera_image(self, **kwargs):
-        """Return image from MYLO, downloading if necessary."""
-        if self._image is None:
+    async def async_camera_image(self, width=None, height=None):
+        """Return image from MYLO, downloading if necessary.
+
+        When Home Assistant asks for a thumbnail size, a cached downscaled
+        variant is served instead of the full frame. After a restart the last
+        archived frame is served without touching the network. The current
+        frame is read from the ring and only copied to ``bytes`` here, since
+        Home Assistant needs ``bytes``.
+        """
+        if self._variants.source is None and self._store is not None:
+            latest = await self.hass.async_add_executor_job(self._store.latest)
+            if latest:
+                _LOGGER.debug("Serving archived snapshot for MYLO %s", self._device_id)
+                self._set_image(latest[1], snapshot_digest(latest[1]), latest[0])
+        if self._variants.source is None:
             _LOGGER.debug("Fetching initial snapshot for MYLO %s", self._device_id)
-            self._image = await download_latest_snapshot(
-                self._device_id, self._refresh_token, self._api_key
-            )
-        return self._image
+            # Nothing is cached to answer a 304 with
+            self._downloader.forget_snapshot()
+            if self._ws:
+                image = await self._ws.async_download_snapshot()
+            else:
+                image = await self._downloader.async_download()
+            if image:
+                self._set_image(image, snapshot_digest(image), archive=True)
+        image = await self._variants.async_get(
+            self.hass.async_add_executor_job, width, height
+        )
+        return None if image is None else bytes(image)
+
+    def _set_image(self, image, digest, timestamp=None, archive=False):
+        timestamp = time.time() if timestamp is None else timestamp
+        if archive:
+            self._archive(image, timestamp)
+        self._image_digest = digest
+        if self._ring.append(image, timestamp):
+            # Serve from the ring and let the downloaded bytes go
+            image = self._ring.latest()[1]
+        self._variants.set_source(image)
+        # Wake live MJPEG streams
+        self._frame_event.set()
+        self._frame_event = asyncio.Event()
 
     def update_image(self, image: bytes | None) -> None:
-        """Update cached image and notify Home Assistant."""
-        if image:
-            _LOGGER.debug("Updating cached image for MYLO %s", self._device_id)
-            self._image = image
-            if self.hass:
-                self.async_write_ha_state()
+        """Update cached image and notify Home Assistant if it changed."""
+        if not image:
+            return
+        digest = snapshot_digest(image)
+        if digest == self._image_digest:
+            _LOGGER.debug("Snapshot for MYLO %s unchanged", self._device_id)
+            return
+        _LOGGER.debug("Updating cached image for MYLO %s", self._device_id)
+        self._set_image(image, digest, archive=True)
+        if self.hass:
+            self.async_write_ha_state()
+
+    def _archive(self, image, timestamp):
+        """Append a new snapshot to the on-disk archive.
+
+        Appends are chained so they reach the archive in the order the ring
+        saw them and both keep the same timestamps.
+        """
+        if self._store is not None and self.hass:
+            self._archive_task = self.hass.async_create_task(
+                self._async_archive(self._archive_task, image, timestamp)
+            )
+
+    async def _async_archive(self, previous, image, timestamp):
+        if previous:
+            await previous
+        try:
+            await self.hass.async_add_executor_job(self._store.append, image, timestamp)
+        except Exception as e:
+            _LOGGER.error(
+                "Error archiving snapshot for MYLO %s: %s", self._device_id, e
+            )
+
+    async def handle_async_mjpeg_stream(self, request):
+        """Stream the current snapshot and append new ones as they arrive.
+
+        With the ``hours`` query parameter the stream is a timelapse instead:
+        the last ``hours`` of history are replayed first. Frames are written
+        as stored, without re-encoding, and recent ones come straight from
+        the in-memory ring. The stream ends when the client goes away or the
+        entity is removed.
+        """
+        try:
+            hours = max(0.0, float(request.query.get("hours", 0)))
+        except ValueError:
+            hours = 0.0
+
+        response = web.StreamResponse()
+        response.content_type = f"multipart/x-mixed-replace;boundary={MJPEG_BOUNDARY}"
+        await response.prepare(request)
+
+        last = None
+        try:
+            if hours:
+                async for timestamp, frame in self._history(time.time() - hours * 3600):
+                    if self._closed:
+                        return response
+                    await self._write_mjpeg_frame(response, frame)
+                    last = timestamp
+                    await asyncio.sleep(TIMELAPSE_FRAME_INTERVAL)
+            if self._variants.source is None:
+                # Load the archived frame or download one to start from
+                await self.async_camera_image()
+            # Each new snapshot is appended to the running stream as it arrives
+            while not self._closed and not _is_closing(request):
+                latest = self._ring.latest()
+                if latest and (last is None or latest[0] > last):
+                    last = latest[0]
+                    await self._write_mjpeg_frame(response, latest[1])
+                    continue
+                try:
+                    await asyncio.wait_for(self._frame_event.wait(), MJPEG_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    pass
+        except ConnectionResetError:
+            _LOGGER.debug("MJPEG client for MYLO %s disconnected", self._device_id)
+        return response
+
+    async def _history(self, start):
+        """Yield ``(timestamp, frame)`` pairs from ``start`` onwards."""
+        timestamps = {ts for ts, _ in self._ring.frames(start)}
+        if self._store is not None:
+            timestamps.update(
+                await self.hass.async_add_executor_job(self._store.timestamps, start)
+            )
+        for timestamp in sorted(timestamps):
+            frame = self._ring.get(timestamp)
+            if frame is None and self._store is not None:
+                stored = await self.hass.async_add_executor_job(
+                    self._store.frame_at, timestamp
+                )
+                frame = stored[1] if stored else None
+            if frame is not None:
+                yield timestamp, frame
+
+    @staticmethod
+    async def _write_mjpeg_frame(response, frame):
+        await response.write(_mjpeg_part_header(len(frame)))
+        await response.write(frame)
+        await response.write(b"\r\n")
 
     @property
     def extra_state_attributes(self):
@@ -2,8 +2,24 @@
 
 import logging
 from homeassistant import config_entries
+from homeassistant.core import callback
 import voluptuous as vol
-from .const import DOMAIN, CONF_IP_ADDRESS, CONF_REFRESH_TOKEN, CONF_API_KEY
+from .const import (
+    DOMAIN,
+    CONF_IP_ADDRESS,
+    CONF_REFRESH_TOKEN,
+    CONF_API_KEY,
+    CONF_METRIC_INTERVALS,
+    CONF_DEADBANDS,
+    CONF_HEARTBEAT,
+    CONF_IMGREADY_DEBOUNCE,
+    CONF_MIN_INTERVALS,
+    DEFAULT_METRIC_INTERVALS,
+    DEFAULT_HEARTBEAT,
+    DEFAULT_IMGREADY_DEBOUNCE,
+    REALTIME_NUMERIC_PATHS,
+    REALTIME_THROTTLE_PATHS,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,3 +46,158 @@ class CoralMyloConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
         return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow handler."""
+        return CoralMyloOptionsFlow(config_entry)
+
+
+class CoralMyloOptionsFlow(config_entries.OptionsFlow):
+    """Handle Coral Mylo options."""
+
+    def __init__(self, config_entry):
+        # Home Assistant only sets ``config_entry`` itself from 2024.11
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Let the user pick which group of options to edit."""
+        return self.async_show_menu(
+            step_id="init",
+            menu_options={
+                "polling": "StatsD polling bounds",
+                "state_writes": "State write filtering",
+                "rate_limits": "Realtime update rate limits",
+                "snapshots": "Snapshot downloads",
+            },
+        )
+
+    async def async_step_polling(self, user_input=None):
+        """Set the polling interval bounds for a StatsD metric."""
+        errors = {}
+        intervals = dict(self._entry.options.get(CONF_METRIC_INTERVALS, {}))
+
+        if user_input is not None:
+            metric = user_input["metric"]
+            # A bound left empty keeps the metric's current value
+            min_s, max_s = intervals.get(metric, DEFAULT_METRIC_INTERVALS[metric])
+            min_s = user_input.get("min_interval", min_s)
+            max_s = user_input.get("max_interval", max_s)
+            if min_s > max_s:
+                errors["base"] = "invalid_interval"
+            else:
+                _LOGGER.debug(
+                    "Polling bounds for %s set to %s-%ss", metric, min_s, max_s
+                )
+                intervals[metric] = [min_s, max_s]
+                return self.async_create_entry(
+                    title="",
+                    data={
+                        **self._entry.options,
+                        CONF_METRIC_INTERVALS: intervals,
+                    },
+                )
+
+        schema = vol.Schema(
+            {
+                vol.Required("metric"): vol.In(list(DEFAULT_METRIC_INTERVALS)),
+                vol.Optional("min_interval"): vol.All(
+                    vol.Coerce(int), vol.Range(min=5)
+                ),
+                vol.Optional("max_interval"): vol.All(
+                    vol.Coerce(int), vol.Range(min=5)
+                ),
+            }
+        )
+
+        return self.async_show_form(
+            step_id="polling", data_schema=schema, errors=errors
+        )
+
+    async def async_step_state_writes(self, user_input=None):
+        """Set a sensor's deadband and the heartbeat for unchanged values."""
+        deadbands = dict(self._entry.options.get(CONF_DEADBANDS, {}))
+        heartbeat = self._entry.options.get(CONF_HEARTBEAT, DEFAULT_HEARTBEAT)
+
+        if user_input is not None:
+            sensor = user_input["sensor"]
+            # Without a deadband only the heartbeat changes
+            if "deadband" in user_input:
+                deadbands[sensor] = user_input["deadband"]
+                _LOGGER.debug("Deadband for %s set to %s", sensor, deadbands[sensor])
+            return self.async_create_entry(
+                title="",
+                data={
+                    **self._entry.options,
+                    CONF_DEADBANDS: deadbands,
+                    CONF_HEARTBEAT: user_input[CONF_HEARTBEAT],
+                },
+            )
+
+        sensors = list(DEFAULT_METRIC_INTERVALS) + list(REALTIME_NUMERIC_PATHS)
+        schema = vol.Schema(
+            {
+                vol.Required("sensor"): vol.In(sensors),
+                vol.Optional("deadband"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Required(CONF_HEARTBEAT, default=heartbeat): vol.All(
+                    vol.Coerce(int), vol.Range(min=60)
+                ),
+            }
+        )
+
+        return self.async_show_form(step_id="state_writes", data_schema=schema)
+
+    async def async_step_rate_limits(self, user_input=None):
+        """Set the minimum interval between updates of a realtime sensor."""
+        min_intervals = dict(self._entry.options.get(CONF_MIN_INTERVALS, {}))
+
+        if user_input is not None:
+            sensor = user_input["sensor"]
+            min_intervals[sensor] = user_input["min_interval"]
+            _LOGGER.debug(
+                "Minimum update interval for %s set to %ss",
+                sensor,
+                min_intervals[sensor],
+            )
+            return self.async_create_entry(
+                title="",
+                data={
+                    **self._entry.options,
+                    CONF_MIN_INTERVALS: min_intervals,
+                },
+            )
+
+        schema = vol.Schema(
+            {
+                vol.Required("sensor"): vol.In(list(REALTIME_THROTTLE_PATHS)),
+                vol.Required("min_interval", default=0): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+            }
+        )
+
+        return self.async_show_form(step_id="rate_limits", data_schema=schema)
+
+    async def async_step_snapshots(self, user_input=None):
+        """Set how long imgready pushes are debounced before a download."""
+        if user_input is not None:
+            _LOGGER.debug(
+                "imgready debounce set to %ss", user_input[CONF_IMGREADY_DEBOUNCE]
+            )
+            return self.async_create_entry(
+                title="", data={**self._entry.options, **user_input}
+            )
+
+        debounce = self._entry.options.get(
+            CONF_IMGREADY_DEBOUNCE, DEFAULT_IMGREADY_DEBOUNCE
+        )
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_IMGREADY_DEBOUNCE, default=debounce): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+            }
+        )
+
+        return self.async_show_form(step_id="snapshots", data_schema=schema)
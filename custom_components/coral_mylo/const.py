@@ -4,3 +4,64 @@ CONF_IP_ADDRESS = "ip"
 CONF_REFRESH_TOKEN = "refresh_token"
 CONF_API_KEY = "api_key"
 DEFAULT_REFRESH_INTERVAL = 300
+DEFAULT_STATSD_INTERVAL = 30
+CONF_METRIC_INTERVALS = "metric_intervals"
+
+# Default (minimum, maximum) polling interval in seconds for each StatsD
+# metric. Intervals shrink towards the minimum while a gauge keeps changing
+# and grow towards the maximum while it stays put.
+DEFAULT_METRIC_INTERVALS = {
+    "water.temperature": (30, 900),
+    "water.level": (30, 600),
+    "water.pressure_sensor": (30, 600),
+    "water.cloudiness": (30, 900),
+    "weather.wind_kph": (30, 600),
+    "weather.aq_pm2_5": (30, 1800),
+    "weather.aq_pm10": (30, 1800),
+    "weather.precip_mm.count": (30, 1800),
+    "weather.vis_km": (30, 1800),
+    "weather.pressure_mb": (30, 1800),
+    "darkness": (30, 900),
+    "manager.alert_level": (30, 300),
+    "pool.used.count": (30, 1800),
+    "robot.count": (30, 1800),
+    "statsd.timestamp_lag": (30, 300),
+}
+
+CONF_DEADBANDS = "deadbands"
+CONF_HEARTBEAT = "heartbeat"
+# Seconds after which an unchanged value is written again
+DEFAULT_HEARTBEAT = 3600
+
+# Numeric realtime sensors, relative to /pooldevices/<id>/
+REALTIME_NUMERIC_PATHS = (
+    "status/cloudiness",
+    "status/battery",
+    "status/temperature/cpu",
+    "status/temperature/gpu",
+    "status/memory",
+)
+
+# Changes smaller than these are not written, keyed by StatsD metric or
+# realtime path. Battery is reported in whole percent, so its 1 % suppresses
+# nothing today; it only keeps genuine 1 % steps written if the firmware ever
+# reports fractions.
+DEFAULT_DEADBANDS = {
+    "water.temperature": 0.1,
+    "status/battery": 1,
+}
+
+CONF_MIN_INTERVALS = "min_intervals"
+# Realtime paths whose updates are rate limited to one per this many seconds;
+# the latest value is still delivered once the interval is up
+DEFAULT_MIN_INTERVALS = {
+    "status/system_ping": 60,
+    "status/temperature/cpu": 30,
+    "status/temperature/gpu": 30,
+}
+# Realtime paths offered in the rate limit options
+REALTIME_THROTTLE_PATHS = REALTIME_NUMERIC_PATHS + ("status/system_ping",)
+
+CONF_IMGREADY_DEBOUNCE = "imgready_debounce"
+# Seconds to wait for imgready pushes to settle before downloading
+DEFAULT_IMGREADY_DEBOUNCE = 2.0
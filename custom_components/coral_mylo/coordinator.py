@@ -0,0 +1,132 @@
+"""Data update coordinator for the MYLO StatsD service."""
+
+import logging
+import time
+from datetime import timedelta
+
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import (
+    DEFAULT_METRIC_INTERVALS,
+    DEFAULT_STATSD_INTERVAL,
+)
+from .utils import StatsdAdminConnection
+
+_LOGGER = logging.getLogger(__name__)
+
+# Gauges due within this many seconds are folded into the current poll
+SCHEDULE_SLACK = 1.0
+
+
+class _MetricSchedule:
+    """Adaptive polling interval for a single gauge."""
+
+    def __init__(self, min_interval, max_interval):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_due = 0.0
+        self._value = None
+        self._seen = False
+
+    def observe(self, value, now):
+        """Record a fetched value and schedule the next read.
+
+        A changed value halves the interval and an unchanged one grows it by
+        half, always within the configured bounds.
+        """
+        if self._seen and value == self._value:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        elif self._seen:
+            self.interval = max(self.min_interval, self.interval / 2)
+        self._value = value
+        self._seen = True
+        self.next_due = now + self.interval
+
+
+class MyloStatsdCoordinator(DataUpdateCoordinator):
+    """Fetch the StatsD gauges once per interval for all MYLO sensors.
+
+    Each sensor registers its gauge name as its listener context, and only
+    those gauges are decoded from the device's dump. Every gauge keeps its
+    own adaptive interval; a poll reads just the gauges that are due and the
+    coordinator sleeps until the next one is.
+    """
+
+    def __init__(self, hass, ip, device_id, intervals=None):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"MYLO StatsD {device_id}",
+            update_interval=timedelta(seconds=DEFAULT_STATSD_INTERVAL),
+        )
+        self._ip = ip
+        self._device_id = device_id
+        self._connection = StatsdAdminConnection(ip)
+        bounds = {**DEFAULT_METRIC_INTERVALS, **(intervals or {})}
+        self._bounds = {
+            self.gauge_key(metric): (min_s, max_s)
+            for metric, (min_s, max_s) in bounds.items()
+        }
+        self._schedules = {}
+
+    @property
+    def device_id(self):
+        return self._device_id
+
+    def gauge_key(self, metric):
+        """Return the full StatsD gauge name for a metric."""
+        if metric.startswith("statsd."):
+            return metric
+        return f"coral.{self._device_id}.{metric}"
+
+    def _schedule(self, key):
+        """Return the polling schedule for a gauge, creating it if needed."""
+        if key not in self._schedules:
+            min_s, max_s = self._bounds.get(
+                key, (DEFAULT_STATSD_INTERVAL, DEFAULT_STATSD_INTERVAL)
+            )
+            self._schedules[key] = _MetricSchedule(min_s, max_s)
+        return self._schedules[key]
+
+    async def _async_update_data(self):
+        """Read the due gauges and merge them into the shared snapshot."""
+        now = time.monotonic()
+        subscribed = set(self.async_contexts())
+        # Until entities subscribe, decode everything so nothing is missed
+        keys = None
+        if subscribed:
+            keys = {
+                key
+                for key in subscribed
+                if self._schedule(key).next_due <= now + SCHEDULE_SLACK
+            }
+        _LOGGER.debug("Polling StatsD gauges on %s for %s", self._ip, keys)
+        if keys == set():
+            gauges = {}
+        else:
+            try:
+                gauges = await self._connection.request("gauges", keys=keys)
+            except Exception as e:
+                raise UpdateFailed(f"Error reading StatsD gauges: {e}") from e
+            if keys is None and not gauges:
+                raise UpdateFailed(f"No gauges returned by StatsD on {self._ip}")
+
+        if keys is None:
+            data = gauges
+        else:
+            for key in keys:
+                self._schedule(key).observe(gauges.get(key), now)
+            previous = self.data or {}
+            data = {key: previous[key] for key in subscribed if key in previous}
+            data.update(gauges)
+            next_due = min(self._schedule(key).next_due for key in subscribed)
+            self.update_interval = timedelta(
+                seconds=max(SCHEDULE_SLACK, next_due - now)
+            )
+        return data
+
+    async def async_shutdown(self):
+        """Close the persistent StatsD connection."""
+        await super().async_shutdown()
+        await self._connection.close()
@@ -0,0 +1,105 @@
+"""Resized snapshot variants for the MYLO camera."""
+
+import asyncio
+import logging
+from collections import OrderedDict
+
+from homeassistant.components.camera.img_util import (
+    TurboJPEGSingleton,
+    find_supported_scaling_factor,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_VARIANT_CACHE_SIZE = 4
+
+
+def jpeg_size(image):
+    """Return ``(width, height)`` of a JPEG, or ``None`` if unknown.
+
+    Blocking: the first call loads libjpeg-turbo.
+    """
+    turbo_jpeg = TurboJPEGSingleton.instance()
+    if not turbo_jpeg:
+        return None
+    try:
+        width, height, _, _ = turbo_jpeg.decode_header(image)
+    except OSError:
+        return None
+    return width, height
+
+
+class SnapshotVariantCache:
+    """Small LRU of downscaled variants of the current snapshot.
+
+    Requests are mapped to Home Assistant's supported JPEG scaling factor for
+    the requested size, so every dashboard tile asking for a similar size
+    shares one variant. Home Assistant rescales the returned image for the
+    exact size anyway; the cache only spares repeated decoding and encoding
+    of the full frame. Variants are built once per snapshot via ``scale``
+    (a blocking ``(image, factor) -> bytes`` callable run in the executor)
+    and concurrent requests for the same variant share a single job.
+    """
+
+    def __init__(self, scale, maxsize=DEFAULT_VARIANT_CACHE_SIZE):
+        self._scale = scale
+        self._maxsize = maxsize
+        self._variants = OrderedDict()
+        self._pending = {}
+        self._source = None
+        self._size = None
+
+    @property
+    def source(self):
+        return self._source
+
+    def set_source(self, image):
+        """Replace the full-resolution snapshot and drop old variants."""
+        self._source = image
+        self._size = None
+        self._variants.clear()
+        self._pending.clear()
+
+    async def async_get(self, executor, width=None, height=None):
+        """Return the snapshot scaled for ``width`` x ``height``.
+
+        ``executor`` is ``hass.async_add_executor_job``.
+        """
+        source = self._source
+        if source is None or not (width and height):
+            return source
+        if self._size is None:
+            size = await executor(jpeg_size, source) or ()
+            if self._source is source:
+                self._size = size
+        else:
+            size = self._size
+        if not size:
+            return source
+        factor = find_supported_scaling_factor(*size, width, height)
+        if factor is None:
+            return source
+        if factor in self._variants:
+            self._variants.move_to_end(factor)
+            return self._variants[factor]
+
+        pending = self._pending.get(factor)
+        if pending is None:
+            pending = asyncio.ensure_future(executor(self._scale, source, factor))
+            self._pending[factor] = pending
+        try:
+            variant = await asyncio.shield(pending)
+        except Exception as e:
+            _LOGGER.error("Error scaling snapshot: %s", e)
+            variant = None
+        finally:
+            if self._pending.get(factor) is pending:
+                del self._pending[factor]
+        if not variant:
+            return source
+        # A newer snapshot may have arrived while scaling
+        if self._source is source:
+            self._variants[factor] = variant
+            while len(self._variants) > self._maxsize:
+                self._variants.popitem(last=False)
+        return variant
@@ -14,14 +14,28 @@ from homeassistant.const import (
     UnitOfTime,
 )
 
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
+from .coordinator import MyloStatsdCoordinator
 from .utils import (
-    discover_device_id_from_statsd,
-    read_gauges_from_statsd,
+    async_discover_device_id_from_statsd,
     MyloWebsocketClient,
+    StateChangeFilter,
+    UpdateThrottle,
     parse_memory_usage,
 )
-from .const import CONF_IP_ADDRESS, DOMAIN
+from .const import (
+    CONF_DEADBANDS,
+    CONF_HEARTBEAT,
+    CONF_IP_ADDRESS,
+    CONF_METRIC_INTERVALS,
+    CONF_MIN_INTERVALS,
+    DEFAULT_DEADBANDS,
+    DEFAULT_HEARTBEAT,
+    DEFAULT_MIN_INTERVALS,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,9 +49,7 @@ async def async_setup_entry(hass, entry, async_add_entities):
     device_id = hass.data.get(DOMAIN, {}).get("device_ids", {}).get(entry.entry_id)
     if not device_id:
         try:
-            device_id = await hass.async_add_executor_job(
-                discover_device_id_from_statsd, ip
-            )
+            device_id = await async_discover_device_id_from_statsd(ip)
             if not device_id:
                 _LOGGER.error("Could not discover device ID for sensors")
                 return
@@ -51,6 +63,17 @@ async def async_setup_entry(hass, entry, async_add_entities):
 
     ws = hass.data.get(DOMAIN, {}).get("ws", {}).get(entry.entry_id)
 
+    # A single coordinator polls StatsD for every gauge-backed sensor
+    coordinator = hass.data.get(DOMAIN, {}).get("coordinators", {}).get(entry.entry_id)
+    if not coordinator:
+        coordinator = MyloStatsdCoordinator(
+            hass, ip, device_id, entry.options.get(CONF_METRIC_INTERVALS)
+        )
+        hass.data.setdefault(DOMAIN, {}).setdefault("coordinators", {})[
+            entry.entry_id
+        ] = coordinator
+    await coordinator.async_refresh()
+
     metrics = [
         (
             "water.temperature",
@@ -144,7 +167,26 @@ async def async_setup_entry(hass, entry, async_add_entities):
         ),
     ]
 
-    sensors = [MyloSensor(ip, device_id, m, n, u, dc) for m, n, u, dc in metrics]
+    deadbands = {**DEFAULT_DEADBANDS, **entry.options.get(CONF_DEADBANDS, {})}
+    heartbeat = entry.options.get(CONF_HEARTBEAT, DEFAULT_HEARTBEAT)
+    min_intervals = {
+        **DEFAULT_MIN_INTERVALS,
+        **entry.options.get(CONF_MIN_INTERVALS, {}),
+    }
+
+    sensors = [
+        MyloSensor(
+            coordinator,
+            device_id,
+            m,
+            n,
+            u,
+            dc,
+            deadband=deadbands.get(m),
+            heartbeat=heartbeat,
+        )
+        for m, n, u, dc in metrics
+    ]
     realtime = []
     if ws:
         realtime_specs = [
@@ -185,31 +227,50 @@ async def async_setup_entry(hass, entry, async_add_entities):
         ]
         for path, name, unit, device_class in realtime_specs:
             full_path = f"/pooldevices/{device_id}/{path}"
-            ent = MyloRealtimeSensor(device_id, name, full_path, ws, unit, device_class)
+            ent = MyloRealtimeSensor(
+                device_id,
+                name,
+                full_path,
+                ws,
+                unit,
+                device_class,
+                deadband=deadbands.get(path),
+                heartbeat=heartbeat,
+                min_interval=min_intervals.get(path),
+            )
             realtime.append(ent)
-            ws.register_sensor(full_path, ent.update_from_ws)
-            _LOGGER.debug("Registered realtime sensor for %s", full_path)
 
-        state_sensor = MyloPoolStateSensor(device_id, ws)
-        realtime.append(state_sensor)
-        ws.register_sensor(state_sensor.path, state_sensor.update_from_ws)
-        _LOGGER.debug("Registered realtime sensor for %s", state_sensor.path)
+        realtime.append(MyloPoolStateSensor(device_id, ws, heartbeat=heartbeat))
 
-    async_add_entities(sensors + realtime, update_before_add=True)
+    async_add_entities(sensors + realtime)
 
 
-class MyloSensor(SensorEntity):
-    """Sensor that polls values from the MYLO StatsD service."""
+class MyloSensor(CoordinatorEntity, SensorEntity):
+    """Sensor backed by the shared MYLO StatsD coordinator."""
 
-    def __init__(self, ip, device_id, metric, name, unit, device_class=None):
+    def __init__(
+        self,
+        coordinator: MyloStatsdCoordinator,
+        device_id,
+        metric,
+        name,
+        unit,
+        device_class=None,
+        deadband=None,
+        heartbeat=DEFAULT_HEARTBEAT,
+    ):
         """Initialize the MYLO sensor."""
-        self._ip = ip
+        self._key = coordinator.gauge_key(metric)
+        # The gauge name doubles as the coordinator context so only the
+        # gauges used by registered sensors are decoded on each poll
+        super().__init__(coordinator, context=self._key)
         self._device_id = device_id
         self._metric = metric
         self._state = None
+        self._change_filter = StateChangeFilter(deadband, heartbeat)
+        self._written_available = None
         self._attr_name = f"Mylo {name}"
         self._attr_unique_id = f"mylo_{device_id}_{metric.replace('.', '_')}"
-        self._attr_should_poll = True
         self._attr_device_info = {
             "identifiers": {(DOMAIN, device_id)},
             "manufacturer": "Coral SmartPool",
@@ -220,34 +281,42 @@ class MyloSensor(SensorEntity):
         if device_class:
             self._attr_device_class = device_class
 
-    async def async_update(self):
-        """Fetch latest value from the MYLO StatsD server."""
-        full_key = (
-            self._metric
-            if self._metric.startswith("statsd.")
-            else f"coral.{self._device_id}.{self._metric}"
-        )
-        _LOGGER.debug("Querying gauge %s on %s", full_key, self._ip)
-        try:
-            gauges = await self.hass.async_add_executor_job(
-                read_gauges_from_statsd, self._ip
-            )
-            value = gauges.get(full_key)
-            if isinstance(value, str):
-                dt = dt_util.parse_datetime(value.replace("Z", "+00:00"))
-                if dt is not None:
-                    if dt.tzinfo is None:
-                        dt = dt.replace(tzinfo=dt_util.UTC)
-                    value = dt_util.as_local(dt)
-            if value is not None:
-                self._state = value
-            else:
-                _LOGGER.warning("No data found for metric %s", full_key)
-        except Exception as e:
-            _LOGGER.error(
-                "Error updating sensor %s: %s", getattr(self, "_name", self._metric), e
-            )
-            # Preserve last known good value on error
+        if coordinator.data:
+            self._update_from_gauges(coordinator.data)
+
+    def _update_from_gauges(self, gauges):
+        """Pick this sensor's value out of a StatsD gauge snapshot.
+
+        Returns ``True`` when the state changed enough to be written.
+        """
+        value = gauges.get(self._key)
+        if isinstance(value, str):
+            dt = dt_util.parse_datetime(value.replace("Z", "+00:00"))
+            if dt is not None:
+                if dt.tzinfo is None:
+                    dt = dt.replace(tzinfo=dt_util.UTC)
+                value = dt_util.as_local(dt)
+        if value is None:
+            # Preserve last known good value when the gauge is missing
+            _LOGGER.warning("No data found for metric %s", self._key)
+            return False
+        if not self._change_filter.should_write(value):
+            return False
+        self._state = value
+        return True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update state from the latest coordinator snapshot.
+
+        The state is only written when the value moved past the deadband,
+        availability changed or the heartbeat is due.
+        """
+        changed = self._update_from_gauges(self.coordinator.data or {})
+        available = self.coordinator.last_update_success
+        if changed or available != self._written_available:
+            self._written_available = available
+            super()._handle_coordinator_update()
 
     @property
     def native_value(self):
@@ -266,12 +335,17 @@ class MyloRealtimeSensor(SensorEntity):
         ws: MyloWebsocketClient,
         unit=None,
         device_class=None,
+        deadband=None,
+        heartbeat=DEFAULT_HEARTBEAT,
+        min_interval=None,
     ):
         self._device_id = device_id
         self._name = name
         self._path = path
         self._state = None
         self._ws = ws
+        self._change_filter = StateChangeFilter(deadband, heartbeat)
+        self._min_interval = min_interval
         self._attr_name = f"Mylo {name}"
         uid = path.replace("/", "_").strip("_")
         self._attr_unique_id = f"mylo_{uid}"
@@ -287,48 +361,71 @@ class MyloRealtimeSensor(SensorEntity):
             "name": f"MYLO {device_id}",
         }
 
+    async def async_added_to_hass(self):
+        """Subscribe to the websocket path while the entity exists.
+
+        With a minimum interval, updates go through a throttle that keeps
+        at most one per interval and always delivers the latest value.
+        """
+        await super().async_added_to_hass()
+        if not self._ws:
+            return
+        throttle = None
+        callback = self.update_from_ws
+        if self._min_interval:
+            throttle = UpdateThrottle(self.hass, self._min_interval, callback)
+            callback = throttle.submit
+        self.async_on_remove(self._ws.subscribe(self._path, callback))
+        if throttle:
+            self.async_on_remove(throttle.cancel)
+        _LOGGER.debug("Registered realtime sensor for %s", self._path)
+
     async def update_from_ws(self, value):
         """Update state from websocket push message."""
         _LOGGER.debug("Realtime sensor %s received %s", self._path, value)
+        attributes = None
         if isinstance(value, str) and self._path.endswith("/status/memory"):
             parsed = parse_memory_usage(value)
             if parsed:
-                self._state = parsed["used_percent"]
-                self._attr_extra_state_attributes = {
+                state = parsed["used_percent"]
+                attributes = {
                     "available_mb": parsed["available_mb"],
                     "swap_percent": parsed["swap_percent"],
                 }
             else:
-                self._state = value
+                state = value
         elif isinstance(value, dict):
             if "status" in value:
-                self._state = value["status"]
+                state = value["status"]
             elif "level" in value:
-                self._state = value["level"]
+                state = value["level"]
             else:
-                self._state = next(iter(value.values()), None)
+                state = next(iter(value.values()), None)
         else:
-            self._state = value
+            state = value
 
-        if isinstance(self._state, str):
-            dt = dt_util.parse_datetime(self._state.replace("Z", "+00:00"))
+        if isinstance(state, str):
+            dt = dt_util.parse_datetime(state.replace("Z", "+00:00"))
             if dt is not None:
                 if dt.tzinfo is None:
                     dt = dt.replace(tzinfo=dt_util.UTC)
                 dt = dt_util.as_local(dt)
                 if self.device_class == SensorDeviceClass.DATE:
-                    self._state = dt.date()
+                    state = dt.date()
                 else:
-                    self._state = dt
+                    state = dt
             elif self.device_class in (
                 SensorDeviceClass.DATE,
                 SensorDeviceClass.TIMESTAMP,
             ):
-                _LOGGER.warning(
-                    "Invalid date format for %s: %s", self._path, self._state
-                )
-                self._state = None
+                _LOGGER.warning("Invalid date format for %s: %s", self._path, state)
+                state = None
 
+        if not self._change_filter.should_write(state, attributes):
+            return
+        self._state = state
+        if attributes is not None:
+            self._attr_extra_state_attributes = attributes
         if getattr(self, "hass", None):
             self.async_write_ha_state()
 
@@ -343,11 +440,17 @@ class MyloPoolStateSensor(SensorEntity):
 
     _STATE_MAP = {1: "empty", 2: "near_pool", 3: "in_pool"}
 
-    def __init__(self, device_id: str, ws: MyloWebsocketClient | None):
+    def __init__(
+        self,
+        device_id: str,
+        ws: MyloWebsocketClient | None,
+        heartbeat=DEFAULT_HEARTBEAT,
+    ):
         self._device_id = device_id
         self._ws = ws
         self._path = f"/pooldevices/{device_id}/state_log"
         self._state: str | None = None
+        self._change_filter = StateChangeFilter(heartbeat=heartbeat)
         self._attr_name = "Mylo Pool State"
         self._attr_unique_id = f"mylo_{device_id}_pool_state"
         self._attr_should_poll = False
@@ -362,6 +465,13 @@ class MyloPoolStateSensor(SensorEntity):
     def path(self) -> str:
         return self._path
 
+    async def async_added_to_hass(self):
+        """Subscribe to the state log while the entity exists."""
+        await super().async_added_to_hass()
+        if self._ws:
+            self.async_on_remove(self._ws.subscribe(self._path, self.update_from_ws))
+            _LOGGER.debug("Registered realtime sensor for %s", self._path)
+
     async def update_from_ws(self, value):
         """Update the sensor from websocket messages."""
         _LOGGER.debug("Pool state sensor received %s", value)
@@ -386,10 +496,14 @@ class MyloPoolStateSensor(SensorEntity):
         _LOGGER.debug("Most recent entry is %s", entry)
 
         code = entry.get("state")
-        self._state = self._STATE_MAP.get(code)
+        state = self._STATE_MAP.get(code)
         ts = entry.get("timestamp")
-        if ts:
-            self._attr_extra_state_attributes = {"timestamp": ts}
+        attributes = {"timestamp": ts} if ts else None
+        if not self._change_filter.should_write(state, attributes):
+            return
+        self._state = state
+        if attributes:
+            self._attr_extra_state_attributes = attributes
         if getattr(self, "hass", None):
             self.async_write_ha_state()
 
@@ -0,0 +1,255 @@
+"""Persistent archive of MYLO snapshots."""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_RING_BYTES = 8 * 1024 * 1024
+ARCHIVE_FILE = "snapshots.bin"
+
+# Each record is a header (magic, unix timestamp, length) and the JPEG bytes
+_RECORD = struct.Struct(">4sdI")
+_MAGIC = b"MYLO"
+# Compact once this share of the retained frames has passed its age limit
+_AGE_SLACK = 0.1
+# Size-triggered compaction trims down to this share of ``max_bytes``
+_SIZE_TARGET = 0.9
+
+
+class SnapshotStore:
+    """Append-only snapshot archive with a time index.
+
+    Frames are appended to a single file. The index of timestamps and file
+    offsets is kept in memory, rebuilt from the record headers on open, and
+    searched with bisection. Retention by size and age is enforced by
+    rewriting the file without the oldest frames, in batches so appends stay
+    cheap on average. All methods block and belong in the executor.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self._directory = directory
+        self._path = os.path.join(directory, ARCHIVE_FILE)
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._file = None
+        self._times = []
+        self._offsets = []
+        self._lengths = []
+        self._size = 0
+
+    def __len__(self):
+        return len(self._times)
+
+    @property
+    def size(self):
+        """Return the archive size in bytes."""
+        return self._size
+
+    def open(self):
+        """Open the archive and load its index, dropping a torn last record."""
+        with self._lock:
+            if self._file:
+                return
+            os.makedirs(self._directory, exist_ok=True)
+            mode = "r+b" if os.path.exists(self._path) else "w+b"
+            self._file = open(self._path, mode)
+            self._load_index()
+
+    def close(self):
+        """Close the archive file."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def append(self, image, timestamp=None):
+        """Store a frame and apply the retention limits."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if not self._file:
+                return
+            # Keep the index sorted even if the clock steps backwards
+            if self._times and timestamp < self._times[-1]:
+                timestamp = self._times[-1]
+            self._file.seek(self._size)
+            self._file.write(_RECORD.pack(_MAGIC, timestamp, len(image)))
+            self._file.write(image)
+            self._file.flush()
+            self._times.append(timestamp)
+            self._offsets.append(self._size + _RECORD.size)
+            self._lengths.append(len(image))
+            self._size += _RECORD.size + len(image)
+            self._enforce_retention(timestamp)
+
+    def latest(self):
+        """Return ``(timestamp, bytes)`` of the newest frame, or ``None``."""
+        with self._lock:
+            if not self._times:
+                return None
+            return self._read(len(self._times) - 1)
+
+    def frame_at(self, timestamp):
+        """Return the newest frame taken at or before ``timestamp``."""
+        with self._lock:
+            idx = bisect_right(self._times, timestamp) - 1
+            if idx < 0:
+                return None
+            return self._read(idx)
+
+    def timestamps(self, start=None, end=None):
+        """Return the frame timestamps within ``[start, end]``."""
+        with self._lock:
+            lo = 0 if start is None else bisect_left(self._times, start)
+            hi = len(self._times) if end is None else bisect_right(self._times, end)
+            return self._times[lo:hi]
+
+    def _read(self, idx):
+        if not self._file:
+            return None
+        self._file.seek(self._offsets[idx])
+        return self._times[idx], self._file.read(self._lengths[idx])
+
+    def _load_index(self):
+        self._times, self._offsets, self._lengths = [], [], []
+        end = self._file.seek(0, os.SEEK_END)
+        pos = 0
+        while pos + _RECORD.size <= end:
+            self._file.seek(pos)
+            magic, timestamp, length = _RECORD.unpack(self._file.read(_RECORD.size))
+            if magic != _MAGIC or pos + _RECORD.size + length > end:
+                break
+            self._times.append(timestamp)
+            self._offsets.append(pos + _RECORD.size)
+            self._lengths.append(length)
+            pos += _RECORD.size + length
+        if pos != end:
+            _LOGGER.warning("Truncating damaged snapshot archive %s", self._path)
+            self._file.truncate(pos)
+        self._size = pos
+
+    def _enforce_retention(self, now):
+        # Always keep the newest frame
+        count = len(self._times)
+        expired = min(bisect_left(self._times, now - self._max_age), count - 1)
+        drop = expired if expired >= max(1, count * _AGE_SLACK) else 0
+        if self._size > self._max_bytes:
+            drop = max(drop, expired)
+            remaining = self._size - (self._offsets[drop] - _RECORD.size)
+            target = self._max_bytes * _SIZE_TARGET
+            while drop < count - 1 and remaining > target:
+                remaining -= _RECORD.size + self._lengths[drop]
+                drop += 1
+        if drop > 0:
+            self._compact(drop)
+
+    def _compact(self, drop):
+        """Rewrite the archive without its ``drop`` oldest frames."""
+        start = self._offsets[drop] - _RECORD.size
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "wb") as tmp:
+            self._file.seek(start)
+            while chunk := self._file.read(1024 * 1024):
+                tmp.write(chunk)
+        self._file.close()
+        os.replace(tmp_path, self._path)
+        self._file = open(self._path, "r+b")
+        del self._times[:drop], self._lengths[:drop], self._offsets[:drop]
+        self._offsets = [offset - start for offset in self._offsets]
+        self._size -= start
+        _LOGGER.debug("Dropped %s frames from snapshot archive", drop)
+
+
+class SnapshotRing:
+    """Fixed-size ring of recent snapshots in an anonymous memory map.
+
+    Frames are copied once into the map and handed out as ``memoryview``
+    slices, so keeping recent history costs a constant amount of memory
+    instead of one ``bytes`` object per frame. The oldest frames are evicted
+    as new ones overwrite their space. A view stays valid until roughly
+    ``capacity`` more bytes have been appended, so consumers on the event
+    loop should finish with it before yielding for long.
+    """
+
+    def __init__(self, capacity=DEFAULT_RING_BYTES):
+        self._capacity = capacity
+        self._map = mmap.mmap(-1, capacity)
+        self._view = memoryview(self._map)
+        self._frames = deque()
+        self._head = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def append(self, image, timestamp=None):
+        """Copy a frame into the ring, evicting the oldest as needed."""
+        size = len(image)
+        if size > self._capacity or self._view is None:
+            return False
+        timestamp = time.time() if timestamp is None else timestamp
+        offset = self._head
+        wrapped = offset + size > self._capacity
+        if wrapped:
+            offset = 0
+        end = offset + size
+        while self._frames:
+            _, start, length = self._frames[0]
+            # Frames past the old head are skipped over when wrapping
+            if (wrapped and start >= self._head) or (
+                start < end and offset < start + length
+            ):
+                self._frames.popleft()
+            else:
+                break
+        self._view[offset:end] = image
+        self._frames.append((timestamp, offset, size))
+        self._head = end
+        return True
+
+    def latest(self):
+        """Return ``(timestamp, memoryview)`` of the newest frame."""
+        if not self._frames:
+            return None
+        return self._slice(self._frames[-1])
+
+    def get(self, timestamp):
+        """Return the frame stored at exactly ``timestamp``, or ``None``."""
+        for frame in reversed(self._frames):
+            if frame[0] == timestamp:
+                return self._slice(frame)[1]
+            if frame[0] < timestamp:
+                break
+        return None
+
+    def frames(self, start=None, end=None):
+        """Return ``(timestamp, memoryview)`` for frames in ``[start, end]``."""
+        return [
+            self._slice(frame)
+            for frame in self._frames
+            if (start is None or frame[0] >= start) and (end is None or frame[0] <= end)
+        ]
+
+    def close(self):
+        """Release the memory map."""
+        self._frames.clear()
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._map.close()
+        except BufferError:
+            # Outstanding views keep the map alive until they are collected
+            pass
+
+    def _slice(self, frame):
+        timestamp, offset, length = frame
+        return timestamp, self._view[offset : offset + length]
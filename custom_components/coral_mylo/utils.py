@@ -1,53 +1,519 @@
 """Utility helpers for the Coral Mylo integration."""
 
+import hashlib
 import logging
+import math
+import random
 import socket
 import asyncio
 import time
 import json
-import ast
 import aiohttp
 import re
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+from functools import partial
 
 _LOGGER = logging.getLogger(__name__)
 STATS_PORT = 8126
+STATS_TIMEOUT = 2
+STATS_TERMINATOR = b"\nEND"
+# Bytes requested per read; dumps are not bounded by the stream line limit
+STATS_CHUNK_SIZE = 65536
+# Firebase ID tokens live for an hour; renew them this many seconds early
+JWT_REFRESH_MARGIN = 300
+JWT_DEFAULT_LIFETIME = 3600
+# A failed renewal is retried after 5 s, doubling up to a minute
+JWT_RETRY_INITIAL = 5.0
+JWT_RETRY_MAX = 60.0
 
 
-def discover_device_id_from_statsd(ip):
-    """Return the device ID by querying the TCP StatsD interface."""
-    _LOGGER.debug("Discovering device id via StatsD on %s", ip)
-    gauges = read_gauges_from_statsd(ip)
+def _device_id_from_gauges(gauges):
+    """Extract the MYLO device ID from a StatsD gauge mapping."""
     for key in gauges.keys():
         if key.startswith("coral."):
             return key.split(".")[1]
     return None
 
 
-def read_gauges_from_statsd(ip):
-    """Read the current StatsD gauges from the MYLO device."""
-    _LOGGER.debug("Reading gauges from StatsD on %s", ip)
+class StatsdResponseBuffer:
+    """Accumulate an admin response until its END terminator arrives.
+
+    Chunks are appended to a single ``bytearray`` and only the newly received
+    bytes (plus enough overlap to catch a split terminator) are searched, so
+    reading a large dump stays linear in its size. :meth:`take` hands out a
+    completed response and keeps the bytes after it, so one buffer can read
+    consecutive responses from a pipelined connection.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._end = -1
+
+    @property
+    def complete(self):
+        return self._end != -1
+
+    @property
+    def response(self):
+        """Return the bytes received before the terminator."""
+        if self._end == -1:
+            return bytes(self._buffer)
+        return bytes(self._buffer[: self._end])
+
+    def feed(self, chunk):
+        """Append a chunk and return ``True`` once the terminator is seen."""
+        if self._end != -1:
+            return True
+        self._buffer.extend(chunk)
+        start = max(0, self._scanned - len(STATS_TERMINATOR) + 1)
+        self._end = self._buffer.find(STATS_TERMINATOR, start)
+        self._scanned = len(self._buffer)
+        return self._end != -1
+
+    def take(self):
+        """Return the completed response and start on the bytes after it."""
+        response = self.response
+        if self._end != -1:
+            del self._buffer[: self._end + len(STATS_TERMINATOR)]
+            self._end = self._buffer.find(STATS_TERMINATOR)
+        else:
+            self._buffer.clear()
+        self._scanned = len(self._buffer)
+        return response
+
+
+_STATSD_LITERALS = {
+    "true": True,
+    "True": True,
+    "false": False,
+    "False": False,
+    "null": None,
+    "None": None,
+    "undefined": None,
+    "NaN": float("nan"),
+    "Infinity": float("inf"),
+    "-Infinity": float("-inf"),
+}
+_STATSD_SCALAR = re.compile(r"[^\s,:\]\}]+")
+_STATSD_BARE_KEY = re.compile(r"[A-Za-z_$][\w$.\-]*")
+_STATSD_SPACE = re.compile(r"\s*")
+_STATSD_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "0": "\0"}
+
+
+class _StatsdDumpDecoder:
+    """Single-pass tokenizer for the object literal printed by StatsD.
+
+    The admin interface prints ``util.inspect`` output: quoted or bare keys,
+    single or double quoted strings, numbers, nested arrays and objects.
+    Values whose keys are not wanted are skipped without being decoded.
+    """
+
+    def __init__(self, text):
+        self._text = text
+        self._pos = 0
+
+    def decode(self, prefix=None, keys=None):
+        """Return the top-level mapping, restricted to the wanted keys.
+
+        ``prefix`` limits the result to keys starting with it and ``keys``
+        to an explicit set of names; values of other keys are skipped.
+        """
+        self._skip_space()
+        if self._pos >= len(self._text):
+            return {}
+        self._expect("{")
+        result = {}
+        while True:
+            self._skip_space()
+            if self._peek() == "}":
+                self._pos += 1
+                return result
+            key = self._key()
+            self._skip_space()
+            self._expect(":")
+            self._skip_space()
+            if (keys is None or key in keys) and (
+                prefix is None or key.startswith(prefix)
+            ):
+                result[key] = self._value()
+            else:
+                self._skip_value()
+            self._skip_space()
+            if self._peek() == ",":
+                self._pos += 1
+
+    def _peek(self):
+        if self._pos >= len(self._text):
+            raise ValueError("Unexpected end of StatsD response")
+        return self._text[self._pos]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(
+                f"Expected {char!r} at offset {self._pos} of StatsD response"
+            )
+        self._pos += 1
+
+    def _skip_space(self):
+        self._pos = _STATSD_SPACE.match(self._text, self._pos).end()
+
+    def _key(self):
+        if self._peek() in "'\"":
+            return self._string()
+        match = _STATSD_BARE_KEY.match(self._text, self._pos)
+        if not match:
+            raise ValueError(f"Invalid key at offset {self._pos} of StatsD response")
+        self._pos = match.end()
+        return match.group()
+
+    def _value(self):
+        char = self._peek()
+        if char in "'\"":
+            return self._string()
+        if char == "[":
+            return self._container("]", self._array_item)
+        if char == "{":
+            return self._container("}", self._object_item)
+        match = _STATSD_SCALAR.match(self._text, self._pos)
+        if not match:
+            raise ValueError(f"Invalid value at offset {self._pos} of StatsD response")
+        self._pos = match.end()
+        token = match.group()
+        if token in _STATSD_LITERALS:
+            return _STATSD_LITERALS[token]
+        try:
+            return int(token)
+        except ValueError:
+            return float(token)
+
+    def _container(self, closing, item):
+        self._pos += 1
+        items = []
+        while True:
+            self._skip_space()
+            if self._peek() == closing:
+                self._pos += 1
+                break
+            items.append(item())
+            self._skip_space()
+            if self._peek() == ",":
+                self._pos += 1
+        return dict(items) if closing == "}" else items
+
+    def _array_item(self):
+        return self._value()
+
+    def _object_item(self):
+        key = self._key()
+        self._skip_space()
+        self._expect(":")
+        self._skip_space()
+        return key, self._value()
+
+    def _string(self):
+        quote = self._text[self._pos]
+        self._pos += 1
+        parts = []
+        while True:
+            end = self._text.find(quote, self._pos)
+            slash = self._text.find("\\", self._pos, end)
+            if end == -1:
+                raise ValueError("Unterminated string in StatsD response")
+            if slash == -1:
+                parts.append(self._text[self._pos : end])
+                self._pos = end + 1
+                return "".join(parts)
+            parts.append(self._text[self._pos : slash])
+            escaped = self._text[slash + 1 : slash + 2]
+            if escaped == "u":
+                parts.append(chr(int(self._text[slash + 2 : slash + 6], 16)))
+                self._pos = slash + 6
+            else:
+                parts.append(_STATSD_ESCAPES.get(escaped, escaped))
+                self._pos = slash + 2
+
+    def _skip_value(self):
+        """Advance past a value without building it."""
+        char = self._peek()
+        if char in "'\"":
+            self._skip_string()
+            return
+        if char not in "[{":
+            match = _STATSD_SCALAR.match(self._text, self._pos)
+            self._pos = match.end() if match else self._pos
+            return
+        depth = 0
+        while True:
+            char = self._peek()
+            if char in "'\"":
+                self._skip_string()
+                continue
+            if char in "[{":
+                depth += 1
+            elif char in "]}":
+                depth -= 1
+            self._pos += 1
+            if depth == 0:
+                return
+
+    def _skip_string(self):
+        quote = self._text[self._pos]
+        pos = self._pos + 1
+        while True:
+            end = self._text.find(quote, pos)
+            if end == -1:
+                raise ValueError("Unterminated string in StatsD response")
+            # Count preceding backslashes to tell escaped quotes apart
+            slashes = 0
+            while self._text[end - 1 - slashes] == "\\":
+                slashes += 1
+            if slashes % 2 == 0:
+                self._pos = end + 1
+                return
+            pos = end + 1
+
+
+def parse_statsd_dump(response, prefix=None, keys=None):
+    """Decode the mapping dumped by a StatsD admin command.
+
+    ``response`` may include the trailing ``END`` marker. When ``prefix`` is
+    given only keys starting with it are decoded and returned, and when
+    ``keys`` is given only those exact keys are.
+    """
+    if isinstance(response, (bytes, bytearray, memoryview)):
+        response = bytes(response).decode("utf-8")
+    end = response.find("\nEND")
+    if end != -1:
+        response = response[:end]
+    return _StatsdDumpDecoder(response).decode(prefix, keys)
+
+
+async def _read_statsd_response(reader, buffer):
+    """Read from ``reader`` until ``buffer`` holds a whole response.
+
+    Raises :class:`asyncio.IncompleteReadError` carrying the bytes received
+    so far if the connection closes before the terminator.
+    """
+    while not buffer.complete:
+        chunk = await reader.read(STATS_CHUNK_SIZE)
+        if not chunk:
+            raise asyncio.IncompleteReadError(buffer.take(), None)
+        buffer.feed(chunk)
+    return buffer.take()
+
+
+async def async_statsd_command(ip, command, timeout=STATS_TIMEOUT, prefix=None):
+    """Send an admin command to StatsD and return the decoded mapping.
+
+    Uses a non-blocking asyncio connection so no executor thread is held
+    while waiting on the device. Errors are raised to the caller. When
+    ``prefix`` is given only keys starting with it are decoded.
+    """
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(ip, STATS_PORT), timeout=timeout
+    )
     try:
-        with socket.create_connection((ip, STATS_PORT), timeout=2) as sock:
-            sock.sendall(b"gauges\n")
-            response = b""
-            while True:
-                chunk = sock.recv(4096)
-                if not chunk:
-                    break
-                response += chunk
-                if b"END" in chunk:
-                    break
-            text = response.decode("utf-8").strip().split("\nEND")[0]
-            return ast.literal_eval(text.strip())
+        writer.write(f"{command}\n".encode())
+        await writer.drain()
+        try:
+            response = await asyncio.wait_for(
+                _read_statsd_response(reader, StatsdResponseBuffer()), timeout=timeout
+            )
+        except asyncio.IncompleteReadError as e:
+            # Connection closed before END, parse what was received
+            response = e.partial
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception as e:
+            _LOGGER.debug("Error closing StatsD connection: %s", e)
+    return parse_statsd_dump(response, prefix)
+
+
+async def async_read_statsd(ip, command, prefix=None):
+    """Return the mapping for a StatsD admin command or ``{}`` on error."""
+    _LOGGER.debug("Reading %s from StatsD on %s", command, ip)
+    try:
+        return await async_statsd_command(ip, command, prefix=prefix)
     except Exception as e:
-        _LOGGER.error(f"Error retrieving gauges: {e}")
+        _LOGGER.error("Error retrieving %s: %s", command, e)
         return {}
 
 
-def get_statsd_gauge_value(ip, key):
-    """Convenience helper to fetch a single StatsD gauge value."""
-    gauges = read_gauges_from_statsd(ip)
-    return gauges.get(key)
+async def async_read_gauges_from_statsd(ip):
+    """Read the current StatsD gauges without blocking the event loop."""
+    return await async_read_statsd(ip, "gauges")
+
+
+async def async_read_counters_from_statsd(ip):
+    """Read the current StatsD counters without blocking the event loop."""
+    return await async_read_statsd(ip, "counters")
+
+
+async def async_read_timers_from_statsd(ip):
+    """Read the current StatsD timers without blocking the event loop."""
+    return await async_read_statsd(ip, "timers")
+
+
+async def async_discover_device_id_from_statsd(ip):
+    """Return the device ID by querying StatsD without blocking."""
+    _LOGGER.debug("Discovering device id via StatsD on %s", ip)
+    gauges = await async_read_statsd(ip, "gauges", prefix="coral.")
+    return _device_id_from_gauges(gauges)
+
+
+class ExponentialBackoff:
+    """Compute growing retry delays between reconnect attempts.
+
+    With ``jitter`` set, each delay is drawn at random from the top
+    ``jitter`` share of its range so that many clients do not retry in step.
+    """
+
+    def __init__(self, initial=1.0, maximum=60.0, factor=2.0, jitter=0.0):
+        self._initial = initial
+        self._maximum = maximum
+        self._factor = factor
+        self._jitter = jitter
+        self._attempts = 0
+
+    def next_delay(self):
+        """Return the delay before the next attempt and advance the backoff."""
+        delay = min(self._maximum, self._initial * self._factor**self._attempts)
+        self._attempts += 1
+        if self._jitter:
+            delay *= 1 - self._jitter * random.random()
+        return delay
+
+    def reset(self):
+        """Start again from the initial delay after a success."""
+        self._attempts = 0
+
+
+class StatsdAdminConnection:
+    """Long-lived connection to the StatsD admin interface of one device.
+
+    Commands are pipelined over a single socket: each request is written as
+    soon as it is issued and responses are matched to callers in order. A
+    request that gets no answer within the timeout marks the socket as
+    half-open and drops it, and reconnects are spaced out with exponential
+    backoff so an unreachable device is not hammered.
+    """
+
+    def __init__(self, ip, port=STATS_PORT, timeout=STATS_TIMEOUT):
+        self._ip = ip
+        self._port = port
+        self._timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._read_task = None
+        self._pending = deque()
+        self._connect_lock = asyncio.Lock()
+        self._backoff = ExponentialBackoff()
+        self._retry_at = 0.0
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def request(self, command, prefix=None, keys=None):
+        """Send a command and return the decoded response mapping.
+
+        ``prefix`` and ``keys`` restrict which entries are decoded, see
+        :func:`parse_statsd_dump`.
+        """
+        writer = await self._ensure_connected()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        try:
+            writer.write(f"{command}\n".encode())
+            await writer.drain()
+            response = await asyncio.wait_for(future, timeout=self._timeout)
+        except asyncio.TimeoutError:
+            self._drop(ConnectionError(f"No reply to {command} from {self._ip}"))
+            raise
+        except (ConnectionError, OSError) as e:
+            self._drop(e)
+            raise
+        return parse_statsd_dump(response, prefix, keys)
+
+    async def close(self):
+        """Close the connection and fail any outstanding requests."""
+        self._drop(ConnectionError("StatsD connection closed"))
+        self._retry_at = 0.0
+        self._backoff.reset()
+
+    async def _ensure_connected(self):
+        """Return an open writer, connecting if needed."""
+        async with self._connect_lock:
+            if self.connected:
+                return self._writer
+            loop = asyncio.get_running_loop()
+            if loop.time() < self._retry_at:
+                raise ConnectionError(
+                    f"StatsD on {self._ip} unavailable, retrying in "
+                    f"{self._retry_at - loop.time():.0f}s"
+                )
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._ip, self._port),
+                    timeout=self._timeout,
+                )
+            except (asyncio.TimeoutError, OSError) as e:
+                delay = self._backoff.next_delay()
+                self._retry_at = loop.time() + delay
+                _LOGGER.debug(
+                    "StatsD connect to %s failed (%s), backing off %ss",
+                    self._ip,
+                    e,
+                    delay,
+                )
+                raise ConnectionError(f"Cannot connect to StatsD: {e}") from e
+            self._backoff.reset()
+            self._retry_at = 0.0
+            sock = writer.get_extra_info("socket")
+            if sock is not None:
+                # Let the kernel probe idle connections for dead peers
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self._reader = reader
+            self._writer = writer
+            self._read_task = loop.create_task(self._read_responses(reader))
+            _LOGGER.debug("StatsD admin connection opened to %s", self._ip)
+            return writer
+
+    async def _read_responses(self, reader):
+        """Resolve pending requests in order as responses arrive."""
+        buffer = StatsdResponseBuffer()
+        try:
+            while True:
+                response = await _read_statsd_response(reader, buffer)
+                if not self._pending:
+                    continue
+                future = self._pending.popleft()
+                # A caller that gave up leaves a done future; drop its reply
+                if not future.done():
+                    future.set_result(response)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _LOGGER.debug("StatsD connection to %s lost: %s", self._ip, e)
+            self._drop(ConnectionError(f"StatsD connection lost: {e}"))
+
+    def _drop(self, exc):
+        """Tear down the socket and fail every waiting request."""
+        if self._read_task and self._read_task is not asyncio.current_task():
+            self._read_task.cancel()
+        self._read_task = None
+        if self._writer:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(exc)
 
 
 def parse_memory_usage(value):
@@ -81,28 +547,227 @@ def parse_memory_usage(value):
     }
 
 
-async def refresh_jwt(refresh_token, api_key):
-    """Refresh the Firebase JWT using the provided refresh token."""
+class StateChangeFilter:
+    """Suppress entity state writes that would not change anything.
+
+    A write is needed when the value or attributes differ from the last
+    written ones. Numeric changes smaller than ``deadband`` are ignored (a
+    change of exactly ``deadband`` is written), and
+    once ``heartbeat`` seconds have passed since the last write the next
+    update is written regardless so the entity never looks stale.
+    """
+
+    def __init__(self, deadband=None, heartbeat=None):
+        self._deadband = deadband
+        self._heartbeat = heartbeat
+        self._written = False
+        self._value = None
+        self._attributes = None
+        self._written_at = 0.0
+
+    def should_write(self, value, attributes=None, now=None):
+        """Return ``True`` and remember the value if it should be written."""
+        now = time.monotonic() if now is None else now
+        fresh = self._heartbeat is None or now - self._written_at < self._heartbeat
+        if self._written and fresh and attributes == self._attributes:
+            if value == self._value or self._within_deadband(value):
+                return False
+        self._written = True
+        self._value = value
+        self._attributes = attributes
+        self._written_at = now
+        return True
+
+    def _within_deadband(self, value):
+        if not self._deadband:
+            return False
+        numbers = (int, float)
+        if not isinstance(value, numbers) or not isinstance(self._value, numbers):
+            return False
+        if isinstance(value, bool) or isinstance(self._value, bool):
+            return False
+        diff = abs(value - self._value)
+        # A step of exactly the deadband is a change despite float rounding
+        return diff < self._deadband and not math.isclose(diff, self._deadband)
+
+
+class UpdateThrottle:
+    """Pass values on to ``deliver`` at most once per ``min_interval``.
+
+    The first value after a quiet period is delivered at once. Values that
+    arrive sooner are held, each replacing the last, and the latest one is
+    delivered when the interval is up, so the final value always lands.
+    """
+
+    def __init__(self, hass, min_interval, deliver):
+        self._hass = hass
+        self._min_interval = min_interval
+        self._deliver = deliver
+        self._delivered_at = None
+        self._pending = None
+        self._handle = None
+
+    async def submit(self, value):
+        """Deliver ``value`` now or hold it for the trailing edge."""
+        now = self._hass.loop.time()
+        if self._handle is None and (
+            self._delivered_at is None or now - self._delivered_at >= self._min_interval
+        ):
+            self._delivered_at = now
+            await self._deliver(value)
+            return
+        self._pending = value
+        if self._handle is None:
+            delay = self._delivered_at + self._min_interval - now
+            self._handle = self._hass.loop.call_later(delay, self._flush)
+
+    def cancel(self):
+        """Drop any held value."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._pending = None
+
+    def _flush(self):
+        self._handle = None
+        value, self._pending = self._pending, None
+        self._delivered_at = self._hass.loop.time()
+        self._hass.async_create_task(self._deliver(value))
+
+
+@asynccontextmanager
+async def _client_session(session=None):
+    """Yield the shared HTTP session, or a temporary one when none is given."""
+    if session is not None:
+        yield session
+        return
+    async with aiohttp.ClientSession() as own_session:
+        yield own_session
+
+
+async def _request_jwt(refresh_token, api_key, session=None):
+    """Exchange the refresh token and return the SecureToken response."""
     url = f"https://securetoken.googleapis.com/v1/token?key={api_key}"
     payload = {"grant_type": "refresh_token", "refresh_token": refresh_token}
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session(session) as session:
             async with session.post(url, data=payload) as resp:
                 data = await resp.json()
-                token = data.get("access_token")
                 _LOGGER.debug("JWT refreshed successfully")
-                return token
+                return data
     except Exception as e:
         _LOGGER.error(f"Exception while refreshing JWT: {e}")
     return None
 
 
-async def fetch_firebase_download_token(bucket, path, jwt):
+async def refresh_jwt(refresh_token, api_key, session=None):
+    """Refresh the Firebase JWT using the provided refresh token."""
+    data = await _request_jwt(refresh_token, api_key, session)
+    return data.get("access_token") if data else None
+
+
+class MyloTokenManager:
+    """Cache the Firebase ID token and renew it before it expires.
+
+    Callers share one cached token until ``margin`` seconds before its
+    ``expires_in`` deadline, and a timer refreshes it in the background at
+    that point. For short-lived tokens the margin shrinks to half the
+    lifetime so refreshes never run back to back. Concurrent refreshes are
+    coalesced into a single request. If a renewal fails while the cached
+    token is still valid, the token keeps being served and the renewal is
+    retried with backoff until it expires.
+    """
+
+    def __init__(self, refresh_token, api_key, session=None, margin=JWT_REFRESH_MARGIN):
+        self._refresh_token = refresh_token
+        self._api_key = api_key
+        self._session = session
+        self._margin = margin
+        self._token = None
+        self._refresh_at = 0.0
+        self._expires_at = 0.0
+        self._inflight = None
+        self._timer = None
+        self._retry = ExponentialBackoff(JWT_RETRY_INITIAL, JWT_RETRY_MAX)
+
+    async def async_get_token(self):
+        """Return a valid token, refreshing only when needed."""
+        loop = asyncio.get_running_loop()
+        if self._token and loop.time() < self._refresh_at:
+            return self._token
+        return await self.async_refresh()
+
+    async def async_refresh(self):
+        """Fetch a new token, joining a refresh that is already running."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.get_running_loop().create_task(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    def invalidate(self):
+        """Drop the cached token, e.g. after the server rejected it."""
+        self._token = None
+        self._refresh_at = 0.0
+        self._expires_at = 0.0
+
+    def stop(self):
+        """Cancel the background refresh."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._inflight and not self._inflight.done():
+            self._inflight.cancel()
+        self._inflight = None
+
+    async def _refresh(self):
+        data = await _request_jwt(self._refresh_token, self._api_key, self._session)
+        token = data.get("access_token") if data else None
+        loop = asyncio.get_running_loop()
+        if not token:
+            return self._refresh_failed(loop)
+        try:
+            expires_in = float(data.get("expires_in", JWT_DEFAULT_LIFETIME))
+        except (TypeError, ValueError):
+            expires_in = JWT_DEFAULT_LIFETIME
+        if not expires_in > 0:
+            expires_in = JWT_DEFAULT_LIFETIME
+        refresh_in = expires_in - min(self._margin, expires_in / 2)
+        self._token = token
+        self._refresh_at = loop.time() + refresh_in
+        self._expires_at = loop.time() + expires_in
+        self._retry.reset()
+        self._schedule(loop, refresh_in)
+        _LOGGER.debug("JWT cached for %ss", expires_in)
+        return token
+
+    def _refresh_failed(self, loop):
+        """Keep a still-valid token and retry, or drop an expired one."""
+        remaining = self._expires_at - loop.time()
+        if not self._token or remaining <= 0:
+            self.invalidate()
+            return None
+        delay = min(self._retry.next_delay(), remaining / 2)
+        _LOGGER.warning("JWT renewal failed, retrying in %.0fs", delay)
+        self._refresh_at = loop.time() + delay
+        self._schedule(loop, delay)
+        return self._token
+
+    def _schedule(self, loop, delay):
+        if self._timer:
+            self._timer.cancel()
+        self._timer = loop.call_later(delay, self._refresh_in_background)
+
+    def _refresh_in_background(self):
+        self._timer = None
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.get_running_loop().create_task(self._refresh())
+
+
+async def fetch_firebase_download_token(bucket, path, jwt, session=None):
     """Retrieve a Firebase download token for the given path."""
     url = f"https://firebasestorage.googleapis.com/v0/b/{bucket}/o/{path}"
     headers = {"Authorization": f"Firebase {jwt}", "Accept": "application/json"}
     try:
-        async with aiohttp.ClientSession() as session:
+        async with _client_session(session) as session:
             async with session.get(url, headers=headers) as resp:
                 data = await resp.json()
                 return data.get("downloadTokens")
@@ -111,74 +776,694 @@ async def fetch_firebase_download_token(bucket, path, jwt):
     return None
 
 
-async def download_latest_snapshot(device_id, refresh_token, api_key):
-    """Return the latest snapshot bytes for the given MYLO device."""
-    _LOGGER.debug("Downloading latest snapshot for %s", device_id)
-    bucket = "coralesto.appspot.com"
-    image_path = f"images%2Fcoral_{device_id}_last.jpg"
+SNAPSHOT_BUCKET = "coralesto.appspot.com"
 
-    jwt = await refresh_jwt(refresh_token, api_key)
-    if not jwt:
-        _LOGGER.error("Failed to refresh JWT")
-        return None
 
-    token = await fetch_firebase_download_token(bucket, image_path, jwt)
-    if not token:
-        _LOGGER.error("Failed to fetch download token")
-        return None
+class MyloSnapshotDownloader:
+    """Download the latest MYLO snapshot, reusing its download token.
+
+    The Firebase download token for ``images/coral_<id>_last.jpg`` rarely
+    changes, so it is cached after the first metadata lookup and the usual
+    download is a single media GET. A 401/403 drops the cached token and the
+    download is retried once with a fresh one. Downloads are conditional on
+    the last ETag, so an unchanged snapshot costs a 304 and returns ``None``.
+    The downloader keeps no copy of the image; callers that lose theirs call
+    :meth:`forget_snapshot` to get the full image again.
+    """
+
+    def __init__(self, device_id, refresh_token, api_key, session=None, tokens=None):
+        self._device_id = device_id
+        self._refresh_token = refresh_token
+        self._api_key = api_key
+        self._session = session
+        self._tokens = tokens
+        self._image_path = f"images%2Fcoral_{device_id}_last.jpg"
+        self._download_token = None
+        self._etag = None
+
+    def invalidate(self):
+        """Forget the cached download token."""
+        self._download_token = None
+
+    def forget_snapshot(self):
+        """Drop the ETag so the next download returns the full image."""
+        self._etag = None
+
+    async def async_download(self):
+        """Return the latest snapshot bytes.
+
+        Returns ``None`` on failure or when the snapshot is unchanged since
+        the last download.
+        """
+        _LOGGER.debug("Downloading latest snapshot for %s", self._device_id)
+        cached = self._download_token is not None
+        token = self._download_token or await self._fetch_download_token()
+        if not token:
+            return None
+        status, data = await self._get_image(token)
+        if status in (401, 403):
+            self.invalidate()
+            if cached:
+                _LOGGER.debug("Download token rejected, fetching a new one")
+                token = await self._fetch_download_token()
+                if not token:
+                    return None
+                status, data = await self._get_image(token)
+                if status in (401, 403):
+                    self.invalidate()
+        return data
+
+    async def _fetch_download_token(self):
+        if self._tokens:
+            jwt = await self._tokens.async_get_token()
+        else:
+            jwt = await refresh_jwt(
+                self._refresh_token, self._api_key, session=self._session
+            )
+        if not jwt:
+            _LOGGER.error("Failed to refresh JWT")
+            return None
+
+        token = await fetch_firebase_download_token(
+            SNAPSHOT_BUCKET, self._image_path, jwt, session=self._session
+        )
+        if not token:
+            _LOGGER.error("Failed to fetch download token")
+            return None
+        self._download_token = token
+        return token
+
+    async def _get_image(self, token):
+        """Fetch the image and return ``(status, bytes or None)``."""
+        image_url = (
+            f"https://firebasestorage.googleapis.com/v0/b/{SNAPSHOT_BUCKET}/o/"
+            f"{self._image_path}?alt=media&token={token}"
+        )
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        try:
+            async with _client_session(self._session) as session:
+                async with session.get(image_url, headers=headers) as resp:
+                    if resp.status == 304:
+                        _LOGGER.debug("Snapshot for %s not modified", self._device_id)
+                        return resp.status, None
+                    if resp.status == 200:
+                        data = await resp.read()
+                        _LOGGER.debug("Snapshot downloaded from %s", image_url)
+                        self._etag = resp.headers.get("ETag")
+                        return resp.status, data
+                    text = await resp.text()
+                    _LOGGER.error(
+                        "Failed to fetch image: %s, Response: %s",
+                        resp.status,
+                        text,
+                    )
+                    return resp.status, None
+        except Exception as e:
+            _LOGGER.error("Exception fetching camera image: %s", e)
+        return None, None
+
+
+def snapshot_digest(image):
+    """Return a short content hash used to detect unchanged snapshots."""
+    return hashlib.blake2b(image, digest_size=16).digest()
+
 
-    image_url = (
-        f"https://firebasestorage.googleapis.com/v0/b/{bucket}/o/"
-        f"{image_path}?alt=media&token={token}"
+async def download_latest_snapshot(
+    device_id, refresh_token, api_key, session=None, tokens=None
+):
+    """Return the latest snapshot bytes for the given MYLO device.
+
+    Pass ``session`` to reuse a pooled ``aiohttp`` session for all requests
+    and ``tokens`` (a :class:`MyloTokenManager`) to reuse a cached JWT. Keep
+    a :class:`MyloSnapshotDownloader` around to also reuse the download token.
+    """
+    downloader = MyloSnapshotDownloader(
+        device_id, refresh_token, api_key, session=session, tokens=tokens
     )
+    return await downloader.async_download()
+
+
+RTDB_HOST = "coralesto.firebaseio.com"
+RTDB_NAMESPACE = "coralesto"
+# Firebase drops idle sockets; the SDK sends a "0" keepalive this often
+RTDB_KEEPALIVE = 45
+# Websocket ping interval; a missing pong closes the socket
+RTDB_HEARTBEAT = 15
+RTDB_REQUEST_TIMEOUT = 10
+# Reconnect delays grow from 1 s to 5 minutes, randomised by up to half
+RTDB_BACKOFF_INITIAL = 1.0
+RTDB_BACKOFF_MAX = 300.0
+RTDB_BACKOFF_JITTER = 0.5
+# A session that lasted this long counts as healthy and resets the backoff
+RTDB_STABLE_SESSION = 60
+# Close codes the server uses for routine disconnects (normal, going away)
+RTDB_CLEAN_CLOSE = (1000, 1001)
+# Redirects followed in a row before backing off from the default host
+RTDB_MAX_REDIRECTS = 5
+# Callback deliveries held between drains; the oldest is dropped beyond this
+RTDB_DISPATCH_MAX = 256
+
+
+class RtdbError(Exception):
+    """Raised when the Realtime Database rejects a request."""
+
+
+class RtdbProtocol:
+    """Firebase Realtime Database wire protocol for one websocket session.
+
+    Requests get an ``r`` id and a future resolved by the matching response.
+    Messages split across several frames are reassembled. Control frames
+    record the handshake, or flag a redirect or shutdown and close the
+    socket. Data pushes are handed to ``on_push(action, body)``.
+    """
+
+    def __init__(self, send, on_push, close=None):
+        self._send = send
+        self._on_push = on_push
+        self._close = close
+        self._closing = None
+        self._next_id = 0
+        self._next_tag = 0
+        self._pending = {}
+        self._frames = None
+        self._remaining = 0
+        self.handshake = asyncio.Event()
+        self.host = None
+        self.session_id = None
+        self.redirect = None
+        self.shutdown = None
+
+    async def request(self, action, body, timeout=RTDB_REQUEST_TIMEOUT):
+        """Send a request and return the data of its ``ok`` response."""
+        self._next_id += 1
+        rid = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[rid] = future
+        try:
+            await self._send(
+                json.dumps({"t": "d", "d": {"r": rid, "a": action, "b": body}})
+            )
+            response = await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending.pop(rid, None)
+        if response.get("s") != "ok":
+            raise RtdbError(
+                f"{action} rejected: {response.get('s')} {response.get('d')}"
+            )
+        return response.get("d")
+
+    async def listen(self, path, query=None):
+        """Listen on ``path``; a query listen gets a tag and is returned."""
+        body = {"p": path, "h": ""}
+        tag = None
+        if query:
+            self._next_tag += 1
+            tag = self._next_tag
+            body.update(q=query, t=tag)
+        await self.request("q", body)
+        return tag
+
+    async def unlisten(self, path, query=None, tag=None):
+        """Stop a listen started with :meth:`listen`."""
+        body = {"p": path}
+        if query:
+            body.update(q=query, t=tag)
+        await self.request("n", body)
+
+    async def keepalive(self):
+        """Send the keepalive frame that stops the server idling us out."""
+        await self._send("0")
+
+    def fail_pending(self, exc):
+        """Fail every outstanding request, e.g. when the socket closed."""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    def feed(self, text):
+        """Process one websocket text frame."""
+        if self._frames is not None:
+            self._frames.append(text)
+            self._remaining -= 1
+            if self._remaining:
+                return
+            text = "".join(self._frames)
+            self._frames = None
+        elif len(text) <= 6 and text.isdigit():
+            # Long messages are preceded by the number of frames they span
+            self._remaining = int(text)
+            self._frames = []
+            return
+        try:
+            message = json.loads(text)
+        except ValueError:
+            _LOGGER.debug("Ignoring malformed RTDB frame: %s", text[:100])
+            return
+        if not isinstance(message, dict):
+            return
+        data = message.get("d")
+        if not isinstance(data, dict):
+            return
+        if message.get("t") == "c":
+            self._handle_control(data.get("t"), data.get("d"))
+        elif message.get("t") == "d":
+            self._handle_data(data)
+
+    def _handle_data(self, data):
+        rid = data.get("r")
+        if rid is not None:
+            future = self._pending.get(rid)
+            if future and not future.done():
+                future.set_result(data.get("b") or {})
+            return
+        action = data.get("a")
+        body = data.get("b") or {}
+        if action in ("d", "m"):
+            self._on_push(action, body)
+        elif action == "c":
+            _LOGGER.warning("RTDB listen on %s revoked", body.get("p"))
+        elif action == "ac":
+            _LOGGER.warning("RTDB credential revoked: %s", body.get("d"))
+            self._request_close()
+
+    def _handle_control(self, kind, data):
+        if kind == "h":
+            data = data or {}
+            self.host = data.get("h")
+            self.session_id = data.get("s")
+            self.handshake.set()
+        elif kind == "r":
+            _LOGGER.debug("RTDB redirected to %s", data)
+            self.redirect = data
+            self._request_close()
+        elif kind == "s":
+            _LOGGER.warning("RTDB connection shut down by server: %s", data)
+            self.shutdown = data or "shutdown"
+            self._request_close()
+        elif kind == "e":
+            _LOGGER.error("RTDB error: %s", data)
+
+    def _request_close(self):
+        # Keep the task referenced so it is not garbage collected mid-close
+        if self._close and self._closing is None:
+            self._closing = asyncio.get_running_loop().create_task(self._close())
 
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(image_url) as resp:
-                if resp.status == 200:
-                    data = await resp.read()
-                    _LOGGER.debug("Snapshot downloaded from %s", image_url)
-                    return data
-                text = await resp.text()
-                _LOGGER.error(
-                    "Failed to fetch image: %s, Response: %s",
-                    resp.status,
-                    text,
-                )
-    except Exception as e:
-        _LOGGER.error("Exception fetching camera image: %s", e)
 
+def split_path(path):
+    """Split an RTDB path into its segments, ignoring surrounding slashes."""
+    return [segment for segment in (path or "").split("/") if segment]
+
+
+def _child_value(value, key):
+    """Return ``value[key]`` for an RTDB object or array, else ``None``."""
+    if isinstance(value, dict):
+        return value.get(key)
+    if isinstance(value, list) and key.isdigit() and int(key) < len(value):
+        return value[int(key)]
     return None
 
 
+def expand_push(action, path, data):
+    """Turn a set (``d``) or merge (``m``) push into ``(segments, value)`` sets.
+
+    A merge carries a dict of child paths, each of which is set on its own.
+    """
+    segments = split_path(path)
+    if action == "m" and isinstance(data, dict):
+        return [(segments + split_path(key), value) for key, value in data.items()]
+    return [(segments, data)]
+
+
+class _TrieNode:
+    __slots__ = ("children", "value")
+
+    def __init__(self):
+        self.children = {}
+        self.value = None
+
+
+class PathTrie:
+    """Values keyed by RTDB path, with lookups over a whole subtree."""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def __contains__(self, path):
+        node = self._find(split_path(path))
+        return node is not None and node.value is not None
+
+    def __iter__(self):
+        """Yield ``(path, value)`` for every stored value."""
+        stack = [("", self._root)]
+        while stack:
+            prefix, node = stack.pop()
+            if node.value is not None:
+                yield prefix or "/", node.value
+            for name, child in node.children.items():
+                stack.append((f"{prefix}/{name}", child))
+
+    def get(self, path):
+        node = self._find(split_path(path))
+        return node.value if node else None
+
+    def set(self, path, value):
+        node = self._root
+        for segment in split_path(path):
+            node = node.children.setdefault(segment, _TrieNode())
+        node.value = value
+
+    def remove(self, path):
+        """Drop the value at ``path`` and prune empty branches."""
+        segments = split_path(path)
+        trail = [self._root]
+        for segment in segments:
+            node = trail[-1].children.get(segment)
+            if node is None:
+                return
+            trail.append(node)
+        trail[-1].value = None
+        for segment, parent in zip(reversed(segments), reversed(trail[:-1])):
+            child = parent.children[segment]
+            if child.value is not None or child.children:
+                break
+            del parent.children[segment]
+
+    def deliveries(self, segments, data):
+        """Yield ``(path, value, data)`` for values at or below ``segments``.
+
+        ``data`` is the new content at ``segments`` and is narrowed down to
+        each stored path, so a set on a parent reaches every child entry.
+        """
+        node = self._find(segments)
+        if node is None:
+            return
+        stack = [("/" + "/".join(segments), node, data)]
+        while stack:
+            path, node, value = stack.pop()
+            if node.value is not None:
+                yield path, node.value, value
+            for name, child in node.children.items():
+                stack.append(
+                    (f"{path.rstrip('/')}/{name}", child, _child_value(value, name))
+                )
+
+    def ancestors(self, segments):
+        """Yield ``(path, value)`` for values strictly above ``segments``."""
+        node = self._root
+        for depth, segment in enumerate(segments):
+            if node.value is not None:
+                yield "/" + "/".join(segments[:depth]), node.value
+            node = node.children.get(segment)
+            if node is None:
+                return
+
+    def _find(self, segments):
+        node = self._root
+        for segment in segments:
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+
+class RtdbMirror:
+    """Local copy of the subscribed RTDB data, patched in place by pushes.
+
+    Reads walk one level per path segment. Like Firebase, a ``None`` or
+    empty value deletes a node and prunes parents left empty.
+    """
+
+    def __init__(self):
+        self._root = None
+
+    def get(self, path):
+        """Return the value at ``path`` (a string or segment list)."""
+        segments = split_path(path) if isinstance(path, str) else path
+        value = self._root
+        for segment in segments:
+            value = _child_value(value, segment)
+            if value is None:
+                return None
+        return value
+
+    def set(self, path, value):
+        """Replace the value at ``path``."""
+        segments = split_path(path) if isinstance(path, str) else path
+        delete = value is None or value == {}
+        if not segments:
+            self._root = None if delete else value
+            return
+        if not isinstance(self._root, dict):
+            if delete and not isinstance(self._root, list):
+                return
+            self._root = _as_object(self._root)
+        node = self._root
+        trail = []
+        for segment in segments[:-1]:
+            child = node.get(segment)
+            if not isinstance(child, dict):
+                if delete and not isinstance(child, list):
+                    return
+                child = node[segment] = _as_object(child)
+            trail.append((node, segment))
+            node = child
+        if delete:
+            node.pop(segments[-1], None)
+            for parent, segment in reversed(trail):
+                if parent[segment]:
+                    break
+                del parent[segment]
+        else:
+            node[segments[-1]] = value
+
+    def clear(self):
+        self._root = None
+
+
+def _as_object(value):
+    """Return an RTDB array as an object keyed by index, or a new dict."""
+    if isinstance(value, list):
+        return {str(i): item for i, item in enumerate(value) if item is not None}
+    return {}
+
+
+def _imgready_time(payload):
+    """Return the request time carried by an imgready push, if any."""
+    if isinstance(payload, dict):
+        payload = payload.get("time")
+    if isinstance(payload, bool) or payload is None:
+        return None
+    try:
+        return int(float(payload))
+    except (TypeError, ValueError):
+        return None
+
+
+class DispatchQueue:
+    """Coalescing queue that runs websocket callbacks in batches.
+
+    Deliveries are keyed (normally by path and callback) and only the
+    latest value per key is kept. The queue drains once per loop iteration
+    in a single task, so a burst of pushes costs one call per key instead
+    of one task per message. At most ``maxsize`` keys are held; beyond that
+    the oldest delivery is dropped.
+    """
+
+    def __init__(self, hass, maxsize=RTDB_DISPATCH_MAX):
+        self._hass = hass
+        self._maxsize = maxsize
+        self._pending = OrderedDict()
+        self._handle = None
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, key, callback, value):
+        """Queue ``callback(value)``, replacing any pending value for ``key``."""
+        self._pending[key] = (callback, value)
+        if len(self._pending) > self._maxsize:
+            dropped, _ = self._pending.popitem(last=False)
+            self.dropped += 1
+            _LOGGER.warning("Dispatch queue full, dropped update for %s", dropped)
+        if self._handle is None:
+            self._handle = self._hass.loop.call_soon(self._drain)
+
+    def discard(self, key):
+        """Forget the pending delivery for ``key``."""
+        self._pending.pop(key, None)
+
+    def clear(self):
+        """Drop all pending deliveries."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._pending.clear()
+
+    def _drain(self):
+        self._handle = None
+        if not self._pending:
+            return
+        batch = list(self._pending.values())
+        self._pending.clear()
+        self._hass.async_create_task(self._deliver(batch))
+
+    async def _deliver(self, batch):
+        for callback, value in batch:
+            try:
+                await callback(value)
+            except Exception:
+                _LOGGER.exception("Error in websocket callback %s", callback)
+
+
 class MyloWebsocketClient:
-    """Persistent Firebase WebSocket for a single MYLO device."""
+    """Persistent Firebase WebSocket for a single MYLO device.
+
+    When ``session`` is given it is used for the socket and token refreshes
+    and left open on stop; otherwise the client owns a private session.
+    Snapshot captures and downloads go through the client so overlapping
+    callers share a single request.
+
+    Paths below one of the ``subtrees`` share a single listen on that
+    subtree. Pushes are routed through a path trie, so sets and merges on a
+    parent path reach every registered child path. Every push is applied to
+    an in-memory mirror, callbacks only run for values that changed, and a
+    callback registered late starts from the mirrored value. Callbacks are
+    queued in a :class:`DispatchQueue`, so a burst of pushes reaches each
+    callback once with the latest value.
+    """
 
-    def __init__(self, hass, device_id, refresh_token, api_key):
+    def __init__(
+        self,
+        hass,
+        device_id,
+        refresh_token,
+        api_key,
+        session=None,
+        tokens=None,
+        downloader=None,
+        subtrees=("status",),
+    ):
         self._hass = hass
         self._device_id = device_id
         self._refresh_token = refresh_token
         self._api_key = api_key
-        self._session = None
+        self._session = session
+        self._owns_session = session is None
+        self._tokens = tokens
+        self._owns_tokens = tokens is None
+        self._downloader = downloader
+        self._capture = None
+        self._download = None
+        self._img_ready_at = None
         self._ws = None
+        self._protocol = None
+        self._host = RTDB_HOST
+        self._backoff = ExponentialBackoff(
+            RTDB_BACKOFF_INITIAL, RTDB_BACKOFF_MAX, jitter=RTDB_BACKOFF_JITTER
+        )
+        self._session_started = None
         self._task = None
-        self._rid = 0
         self._running = False
-        self._img_event = asyncio.Event()
+        self._pending_images = {}
         self._connected = asyncio.Event()
-        self._sensor_callbacks = {}
+        self._sensor_callbacks = PathTrie()
+        self._mirror = RtdbMirror()
+        self._dispatch = DispatchQueue(hass)
+        # The client itself always listens for imgready to complete captures
+        self._listen_refs = Counter({f"/pooldevices/{device_id}/imgready": 1})
+        self._subtrees = [
+            split_path(f"/pooldevices/{device_id}/{subtree}") for subtree in subtrees
+        ]
+
+    def subscribe(self, path, callback):
+        """Call ``callback`` with each new value at ``path``.
+
+        Any number of callbacks may share a path. The first subscriber to a
+        listen path sends its listen right away if the socket is up, and the
+        last one to leave sends the unlisten. Returns a function that
+        unsubscribes.
+        """
+        path = "/" + "/".join(split_path(path))
+        callbacks = self._sensor_callbacks.get(path)
+        if callbacks is None:
+            callbacks = []
+            self._sensor_callbacks.set(path, callbacks)
+        callbacks.append(callback)
+        listen_path = self._listen_path(path)
+        self._listen_refs[listen_path] += 1
+        if self._listen_refs[listen_path] == 1:
+            self._schedule_listen_update(listen_path)
+        _LOGGER.debug("Subscribed to %s", path)
+        value = self._mirror.get(path)
+        if value is not None:
+            self._dispatch.put((path, callback), callback, value)
+        return partial(self._unsubscribe, path, callback)
 
     def register_sensor(self, path, callback):
         """Register callback for updates on a path."""
-        self._sensor_callbacks[path] = callback
-        _LOGGER.debug("Sensor callback registered for %s", path)
+        return self.subscribe(path, callback)
+
+    def _unsubscribe(self, path, callback):
+        callbacks = self._sensor_callbacks.get(path)
+        if not callbacks or callback not in callbacks:
+            return
+        callbacks.remove(callback)
+        self._dispatch.discard((path, callback))
+        if not callbacks:
+            self._sensor_callbacks.remove(path)
+        listen_path = self._listen_path(path)
+        self._listen_refs[listen_path] -= 1
+        if not self._listen_refs[listen_path]:
+            del self._listen_refs[listen_path]
+            self._schedule_listen_update(listen_path)
+        _LOGGER.debug("Unsubscribed from %s", path)
+
+    def _schedule_listen_update(self, path):
+        """Send a listen or unlisten for ``path`` now if connected."""
+        if self._protocol is not None and self._connected.is_set():
+            self._hass.async_create_task(self._update_listen(self._protocol, path))
+
+    async def _update_listen(self, protocol, path):
+        try:
+            if self._listen_refs.get(path):
+                await protocol.listen(path)
+            else:
+                await protocol.unlisten(path)
+                if not any(
+                    other.startswith(f"{path}/") or path.startswith(f"{other}/")
+                    for other in self._listen_refs
+                ):
+                    # Nothing keeps this data fresh any more
+                    self._mirror.set(path, None)
+        except Exception as e:
+            _LOGGER.error("Error updating listen on %s: %s", path, e)
+
+    def get(self, path):
+        """Return the last known value at ``path`` without a server request."""
+        return self._mirror.get(path)
 
     async def start(self):
         """Start the websocket connection."""
         if self._running:
             return
         self._running = True
-        self._session = aiohttp.ClientSession()
+        if self._owns_session:
+            self._session = aiohttp.ClientSession()
+        if self._tokens is None:
+            self._tokens = MyloTokenManager(
+                self._refresh_token, self._api_key, self._session
+            )
+        if self._downloader is None:
+            self._downloader = MyloSnapshotDownloader(
+                self._device_id,
+                self._refresh_token,
+                self._api_key,
+                session=self._session,
+                tokens=self._tokens,
+            )
         _LOGGER.debug("Starting websocket for MYLO %s", self._device_id)
         self._task = self._hass.loop.create_task(self._run())
 
@@ -191,65 +1476,34 @@ class MyloWebsocketClient:
                 await self._task
             except asyncio.CancelledError:
                 pass
+        self._dispatch.clear()
         if self._ws:
             await self._ws.close()
-        if self._session:
+        if self._tokens and self._owns_tokens:
+            self._tokens.stop()
+            self._tokens = None
+        if self._session and self._owns_session:
             await self._session.close()
+            self._session = None
         _LOGGER.debug("Websocket for MYLO %s stopped", self._device_id)
 
-    async def _send(self, data):
-        """Send a JSON message if the socket is open."""
-        if not self._ws:
-            return
-        await self._ws.send_json(data)
-
     async def _run(self):
-        """Main loop for maintaining the Firebase websocket."""
-        url = "wss://coralesto.firebaseio.com/.ws?v=5&ns=coralesto"
+        """Main loop for maintaining the Firebase websocket.
+
+        Failed attempts are retried with jittered exponential backoff. After
+        a healthy session ends in a routine server close, the client
+        reconnects at once. Shard redirects are followed straight away, up to
+        ``RTDB_MAX_REDIRECTS`` in a row. Any attempt that fails before the
+        handshake starts over from the default host.
+        """
+        redirects = 0
         while self._running:
+            clean = False
+            self._session_started = None
             try:
-                jwt = await refresh_jwt(self._refresh_token, self._api_key)
-                if not jwt:
-                    await asyncio.sleep(5)
-                    continue
-                self._ws = await self._session.ws_connect(url)
-                self._rid = 1
-                _LOGGER.debug("Websocket connected for MYLO %s", self._device_id)
-                await self._send(
-                    {"t": "d", "d": {"r": self._rid, "a": "auth", "b": {"cred": jwt}}}
-                )
-                await asyncio.wait_for(self._ws.receive(), timeout=5)
-                self._rid += 1
-                # subscribe to sensors and imgready
-                for path in list(self._sensor_callbacks.keys()) + [
-                    f"pooldevices/{self._device_id}/imgready"
-                ]:
-                    await self._send(
-                        {"t": "d", "d": {"r": self._rid, "a": "q", "b": {"p": path}}}
-                    )
-                    self._rid += 1
-                self._connected.set()
-                async for msg in self._ws:
-                    if msg.type != aiohttp.WSMsgType.TEXT:
-                        continue
-                    try:
-                        data = json.loads(msg.data)
-                    except Exception:
-                        continue
-                    path = data.get("d", {}).get("b", {}).get("p")
-                    payload = data.get("d", {}).get("b", {}).get("d")
-                    norm_path = (
-                        f"/{path}" if path and not path.startswith("/") else path
-                    )
-                    _LOGGER.debug("WS message on %s: %s", path, payload)
-                    if norm_path == f"/pooldevices/{self._device_id}/imgready":
-                        self._img_event.set()
-                    elif norm_path in self._sensor_callbacks:
-                        cb = self._sensor_callbacks[norm_path]
-                        self._hass.async_create_task(cb(payload))
+                clean = await self._connect()
             except Exception as e:
                 _LOGGER.error("WebSocket connection error: %s", e)
-                _LOGGER.debug("Retrying websocket connection in 5s")
             finally:
                 self._connected.clear()
                 if self._ws:
@@ -258,7 +1512,155 @@ class MyloWebsocketClient:
                     except Exception as e:
                         _LOGGER.debug("Error closing websocket: %s", e)
                     self._ws = None
-            await asyncio.sleep(5)
+            protocol, self._protocol = self._protocol, None
+            if protocol and protocol.redirect:
+                redirects += 1
+                if redirects <= RTDB_MAX_REDIRECTS:
+                    self._host = protocol.redirect
+                    continue
+                _LOGGER.warning("Too many websocket redirects, backing off")
+                redirects = 0
+            elif protocol and protocol.handshake.is_set():
+                redirects = 0
+            if protocol is None or not protocol.handshake.is_set():
+                # The pinned or redirected shard may be gone
+                self._host = RTDB_HOST
+            started = self._session_started
+            if started and self._hass.loop.time() - started >= RTDB_STABLE_SESSION:
+                self._backoff.reset()
+                if clean and not protocol.shutdown:
+                    _LOGGER.debug("Server closed websocket, reconnecting")
+                    continue
+            delay = self._backoff.next_delay()
+            _LOGGER.debug("Retrying websocket connection in %.1fs", delay)
+            await asyncio.sleep(delay)
+
+    async def _connect(self):
+        """Run one websocket session until it closes.
+
+        Returns whether the server closed the socket cleanly.
+        """
+        jwt = await self._tokens.async_get_token()
+        if not jwt:
+            raise RtdbError("no JWT available")
+        url = f"wss://{self._host}/.ws?v=5&ns={RTDB_NAMESPACE}"
+        self._ws = ws = await self._session.ws_connect(url, heartbeat=RTDB_HEARTBEAT)
+        self._protocol = protocol = RtdbProtocol(
+            ws.send_str, self._handle_push, ws.close
+        )
+        reader = self._hass.loop.create_task(self._read(ws, protocol))
+        keepalive = None
+        try:
+            # A redirect arrives instead of the handshake and closes the socket
+            handshake = self._hass.loop.create_task(protocol.handshake.wait())
+            try:
+                await asyncio.wait(
+                    (handshake, reader),
+                    timeout=RTDB_REQUEST_TIMEOUT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                handshake.cancel()
+            if not protocol.handshake.is_set():
+                if protocol.redirect:
+                    return False
+                raise RtdbError("no handshake from server")
+            if protocol.host:
+                self._host = protocol.host
+            _LOGGER.debug("Websocket connected for MYLO %s", self._device_id)
+
+            try:
+                await protocol.request("auth", {"cred": jwt})
+            except RtdbError:
+                self._tokens.invalidate()
+                raise
+            paths = self._listen_paths()
+            results = await asyncio.gather(
+                *(protocol.listen(path) for path in paths), return_exceptions=True
+            )
+            for path, result in zip(paths, results):
+                if isinstance(result, Exception):
+                    _LOGGER.error("Error listening on %s: %s", path, result)
+            self._connected.set()
+            # Catch up with subscriptions that changed while connecting
+            for path in set(paths).symmetric_difference(self._listen_paths()):
+                self._schedule_listen_update(path)
+            self._session_started = self._hass.loop.time()
+            keepalive = self._hass.loop.create_task(self._keepalive(protocol))
+            await reader
+            return ws.close_code in RTDB_CLEAN_CLOSE
+        finally:
+            for task in (reader, keepalive):
+                if task is None:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception():
+                    _LOGGER.debug(
+                        "Websocket task for MYLO %s failed: %s",
+                        self._device_id,
+                        task.exception(),
+                    )
+            protocol.fail_pending(ConnectionError("websocket closed"))
+
+    async def _read(self, ws, protocol):
+        """Feed incoming frames to the protocol until the socket closes."""
+        async for msg in ws:
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                protocol.feed(msg.data)
+        _LOGGER.debug("Websocket for MYLO %s closed", self._device_id)
+
+    async def _keepalive(self, protocol):
+        while True:
+            await asyncio.sleep(RTDB_KEEPALIVE)
+            await protocol.keepalive()
+
+    @staticmethod
+    def _narrow(value, segments, path):
+        """Return the part of ``value`` (found at ``segments``) at ``path``."""
+        for key in split_path(path)[len(segments) :]:
+            value = _child_value(value, key)
+        return value
+
+    def _listen_path(self, path):
+        """Return the path whose listen covers ``path``."""
+        segments = split_path(path)
+        for subtree in self._subtrees:
+            if segments[: len(subtree)] == subtree:
+                segments = subtree
+                break
+        return "/" + "/".join(segments)
+
+    def _listen_paths(self):
+        """Return the paths to listen on, one per subtree or leaf."""
+        return sorted(self._listen_refs)
+
+    def _handle_push(self, action, body):
+        """Dispatch a data push to the registered callbacks."""
+        _LOGGER.debug("WS %s on %s: %s", action, body.get("p"), body.get("d"))
+        imgready = split_path(f"/pooldevices/{self._device_id}/imgready")
+        for segments, data in expand_push(action, body.get("p"), body.get("d")):
+            previous = self._mirror.get(segments)
+            self._mirror.set(segments, data)
+            if imgready[: len(segments)] == segments:
+                value = data
+                for key in imgready[len(segments) :]:
+                    value = _child_value(value, key)
+                if value is not None:
+                    self._resolve_imgready(value)
+            if previous == data:
+                continue
+            for path, callbacks in self._sensor_callbacks.ancestors(segments):
+                value = self._mirror.get(path)
+                for cb in callbacks:
+                    self._dispatch.put((path, cb), cb, value)
+            for path, callbacks, value in self._sensor_callbacks.deliveries(
+                segments, data
+            ):
+                if value == self._narrow(previous, segments, path):
+                    continue
+                for cb in callbacks:
+                    self._dispatch.put((path, cb), cb, value)
 
     async def send_getimage(self, mobile_id="ha", timeout=30):
         """Trigger MYLO to capture a new image and wait for readiness."""
@@ -272,33 +1674,85 @@ class MyloWebsocketClient:
             _LOGGER.error("WebSocket not connected within timeout")
             return False
 
-        self._img_event.clear()
-        self._rid += 1
+        # The request time identifies this capture in the imgready push
+        requested = int(time.time() * 1000)
+        while requested in self._pending_images:
+            requested += 1
+        future = self._hass.loop.create_future()
+        self._pending_images[requested] = future
         try:
-            await self._send(
+            await self._protocol.request(
+                "m",
                 {
-                    "t": "d",
-                    "d": {
-                        "r": self._rid,
-                        "a": "m",
-                        "b": {
-                            "p": f"/pooldevices/{self._device_id}/getimage",
-                            "d": {
-                                "device": mobile_id,
-                                "time": str(int(time.time() * 1000)),
-                            },
-                        },
-                    },
-                }
+                    "p": f"/pooldevices/{self._device_id}/getimage",
+                    "d": {"device": mobile_id, "time": str(requested)},
+                },
             )
+            await asyncio.wait_for(future, timeout=timeout)
+            _LOGGER.debug("Image ready event received for request %s", requested)
+            return True
+        except asyncio.TimeoutError:
+            _LOGGER.error("Timeout waiting for image ready event")
+            return False
         except Exception as e:
             _LOGGER.error("Error sending getimage request: %s", e)
             return False
+        finally:
+            self._pending_images.pop(requested, None)
 
-        try:
-            await asyncio.wait_for(self._img_event.wait(), timeout=timeout)
-            _LOGGER.debug("Image ready event received")
-            return True
-        except asyncio.TimeoutError:
-            _LOGGER.error("Timeout waiting for image ready event")
+    def _resolve_imgready(self, payload):
+        """Complete the getimage requests an imgready push answers.
+
+        A push carrying a ``time`` satisfies requests sent at or before that
+        time, so the stale value Firebase replays on subscribe is ignored.
+        Pushes without a time cannot be matched and satisfy every request.
+        """
+        self._img_ready_at = self._hass.loop.time()
+        ready = _imgready_time(payload)
+        for requested, future in self._pending_images.items():
+            if future.done():
+                continue
+            if ready is None or ready >= requested:
+                future.set_result(True)
+            else:
+                _LOGGER.debug(
+                    "Ignoring imgready %s older than request %s", ready, requested
+                )
+
+    def snapshot_is_current(self):
+        """Return whether a download started after the last imgready push."""
+        if self._download is None or self._img_ready_at is None:
             return False
+        return self._download[1] >= self._img_ready_at
+
+    async def async_download_snapshot(self, not_before=None):
+        """Download the latest snapshot, joining a download in progress.
+
+        A running download is only shared if it started at or after
+        ``not_before`` (an event loop time), so callers that need a frame
+        newer than some event never receive an older one.
+        """
+        loop = self._hass.loop
+        if self._download:
+            task, started = self._download
+            if not task.done() and (not_before is None or started >= not_before):
+                return await asyncio.shield(task)
+        task = loop.create_task(self._downloader.async_download())
+        self._download = (task, loop.time())
+        return await asyncio.shield(task)
+
+    async def async_capture(self, timeout=30):
+        """Capture a new snapshot and return its bytes.
+
+        Overlapping callers await the same capture and download.
+        """
+        if self._capture is None or self._capture.done():
+            self._capture = self._hass.loop.create_task(self._capture_snapshot(timeout))
+        return await asyncio.shield(self._capture)
+
+    async def _capture_snapshot(self, timeout):
+        if not await self.send_getimage(timeout=timeout):
+            _LOGGER.error("MYLO did not report new image ready")
+            return None
+        _LOGGER.debug("MYLO %s reported new image", self._device_id)
+        return await self.async_download_snapshot(not_before=self._img_ready_at)
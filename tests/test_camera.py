@@ -0,0 +1,503 @@
+"""Tests for the MYLO camera module."""
+
+import asyncio
+import importlib.util
+from pathlib import Path
+import sys
+import types
+
+# Stub out Home Assistant and aiohttp modules required by the camera
+aiohttp_module = sys.modules.setdefault("aiohttp", types.ModuleType("aiohttp"))
+
+
+class StreamResponse:
+    """Records MJPEG output and hangs up after ``max_writes`` writes."""
+
+    max_writes = None
+
+    def __init__(self):
+        self.content_type = None
+        self.writes = []
+
+    async def prepare(self, request):
+        pass
+
+    async def write(self, data):
+        if self.max_writes is not None and len(self.writes) >= self.max_writes:
+            raise ConnectionResetError
+        self.writes.append(bytes(data))
+
+
+web_module = types.ModuleType("aiohttp.web")
+web_module.StreamResponse = StreamResponse
+sys.modules["aiohttp.web"] = web_module
+
+ha = types.ModuleType("homeassistant")
+ha.__path__ = []
+sys.modules.setdefault("homeassistant", ha)
+sys.modules.setdefault(
+    "homeassistant.components", types.ModuleType("homeassistant.components")
+)
+sys.modules.setdefault(
+    "homeassistant.helpers", types.ModuleType("homeassistant.helpers")
+)
+
+camera_component = types.ModuleType("homeassistant.components.camera")
+
+
+class Camera:
+    """Simplified stand-in for Home Assistant's Camera entity."""
+
+    hass = None
+
+    async def async_added_to_hass(self):
+        pass
+
+    async def async_will_remove_from_hass(self):
+        pass
+
+    def async_write_ha_state(self):
+        self.writes = getattr(self, "writes", 0) + 1
+
+
+camera_component.Camera = Camera
+sys.modules["homeassistant.components.camera"] = camera_component
+
+img_util = types.ModuleType("homeassistant.components.camera.img_util")
+img_util.JPEG_QUALITY = 75
+img_util.TurboJPEGSingleton = types.SimpleNamespace(instance=lambda: None)
+img_util.find_supported_scaling_factor = lambda *args: None
+sys.modules["homeassistant.components.camera.img_util"] = img_util
+
+aiohttp_client = types.ModuleType("homeassistant.helpers.aiohttp_client")
+aiohttp_client.async_get_clientsession = lambda hass: None
+sys.modules["homeassistant.helpers.aiohttp_client"] = aiohttp_client
+
+debounce_module = types.ModuleType("homeassistant.helpers.debounce")
+
+
+class Debouncer:
+    """Trailing-edge debouncer behaving like Home Assistant's."""
+
+    def __init__(self, hass, logger, *, cooldown, immediate, function):
+        self.hass = hass
+        self.cooldown = cooldown
+        self.function = function
+        self._timer = None
+        self._execute = False
+
+    async def async_call(self):
+        self._execute = True
+        if self._timer is None:
+            self._timer = self.hass.loop.call_later(self.cooldown, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        if self._execute:
+            self._execute = False
+            self.hass.async_create_task(self.function())
+            self._timer = self.hass.loop.call_later(self.cooldown, self._on_timer)
+
+    def async_cancel(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+
+debounce_module.Debouncer = Debouncer
+sys.modules["homeassistant.helpers.debounce"] = debounce_module
+
+event_module = types.ModuleType("homeassistant.helpers.event")
+event_module.async_track_time_interval = lambda hass, action, interval: lambda: None
+sys.modules["homeassistant.helpers.event"] = event_module
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+custom_components = types.ModuleType("custom_components")
+custom_components.__path__ = [str(Path("custom_components"))]
+sys.modules.setdefault("custom_components", custom_components)
+
+coral_pkg = types.ModuleType("custom_components.coral_mylo")
+coral_pkg.__path__ = [str(Path("custom_components/coral_mylo"))]
+sys.modules.setdefault("custom_components.coral_mylo", coral_pkg)
+
+# The camera imports ``web`` from whichever aiohttp stub is installed
+aiohttp_module.web = web_module
+camera_path = Path("custom_components/coral_mylo/camera.py")
+spec = importlib.util.spec_from_file_location(
+    "custom_components.coral_mylo.camera", camera_path
+)
+camera = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(camera)
+
+
+def jpeg(tag):
+    """Return a tiny JPEG-like payload that differs per ``tag``."""
+    return b"\xff\xd8" + tag.encode() + b"\xff\xd9"
+
+
+def make_hass(tmp_path=None):
+    loop = asyncio.get_running_loop()
+    return types.SimpleNamespace(
+        loop=loop,
+        data={},
+        config=types.SimpleNamespace(
+            path=lambda *parts: str(tmp_path.joinpath(*parts))
+        ),
+        async_create_task=loop.create_task,
+        async_add_executor_job=lambda func, *args: loop.run_in_executor(
+            None, func, *args
+        ),
+    )
+
+
+class FakeDownloader:
+    def __init__(self, image=None):
+        self.image = image
+        self.downloads = 0
+        self.forgotten = 0
+
+    async def async_download(self):
+        self.downloads += 1
+        return self.image
+
+    def forget_snapshot(self):
+        self.forgotten += 1
+
+
+def test_camera_serves_current_frame_from_ring():
+    async def run():
+        cam = camera.MyloCamera("ip", "dev", None, FakeDownloader(jpeg("a")))
+        cam.hass = make_hass()
+        first = await cam.async_camera_image()
+        cam.update_image(jpeg("b"))
+        second = await cam.async_camera_image()
+        source = cam._variants.source
+        ringed = bytes(cam._ring.latest()[1])
+        cam._variants.set_source(None)
+        cam._ring.close()
+        return cam, first, second, source, ringed
+
+    cam, first, second, source, ringed = asyncio.run(run())
+    assert first == jpeg("a")
+    assert second == ringed == jpeg("b")
+    assert isinstance(second, bytes)
+    # The only in-memory copy of the frame is the one in the ring
+    assert isinstance(source, memoryview)
+    assert not hasattr(cam, "_image")
+    assert cam._downloader.forgotten == 1
+
+
+def frames_written(response):
+    """Return the JPEG payloads written to an MJPEG response."""
+    return [
+        data
+        for data in response.writes
+        if data != b"\r\n" and not data.startswith(b"--")
+    ]
+
+
+async def wait_for_writes(response, count):
+    while len(response.writes) < count:
+        await asyncio.sleep(0.01)
+
+
+class FakeTransport:
+    def __init__(self):
+        self.closing = False
+
+    def is_closing(self):
+        return self.closing
+
+
+def run_stream(cam, query, drive, max_writes, transport=None):
+    """Run the MJPEG handler until the client hangs up; return the frames."""
+
+    async def run():
+        responses = []
+
+        class Response(StreamResponse):
+            def __init__(self):
+                super().__init__()
+                self.max_writes = max_writes
+                responses.append(self)
+
+        camera.web.StreamResponse = Response
+        try:
+            request = types.SimpleNamespace(
+                query=query, transport=transport or FakeTransport()
+            )
+            stream = asyncio.ensure_future(cam.handle_async_mjpeg_stream(request))
+            while not responses:
+                await asyncio.sleep(0)
+            await drive(responses[0])
+            await asyncio.wait_for(stream, 5)
+        finally:
+            camera.web.StreamResponse = StreamResponse
+            cam._variants.set_source(None)
+            cam._ring.close()
+        return frames_written(responses[0])
+
+    return run
+
+
+def test_mjpeg_stream_defaults_to_live_view():
+    async def run():
+        cam = camera.MyloCamera("ip", "dev", None, FakeDownloader())
+        cam.hass = make_hass()
+        cam.update_image(jpeg("old"))
+        cam.update_image(jpeg("current"))
+
+        async def drive(response):
+            await wait_for_writes(response, 3)
+            cam.update_image(jpeg("new"))
+            await wait_for_writes(response, 6)
+            # The next frame finds the client gone
+            cam.update_image(jpeg("later"))
+
+        return await run_stream(cam, {}, drive, max_writes=6)()
+
+    assert asyncio.run(run()) == [jpeg("current"), jpeg("new")]
+
+
+def test_mjpeg_stream_ends_when_entity_is_removed():
+    async def run():
+        cam = camera.MyloCamera("ip", "dev", None, FakeDownloader())
+        cam.hass = make_hass()
+        cam.update_image(jpeg("current"))
+
+        async def drive(response):
+            await wait_for_writes(response, 3)
+            await cam.async_will_remove_from_hass()
+
+        return await run_stream(cam, {}, drive, max_writes=100)()
+
+    assert asyncio.run(run()) == [jpeg("current")]
+
+
+def test_mjpeg_stream_ends_when_client_transport_closes(monkeypatch):
+    monkeypatch.setattr(camera, "MJPEG_IDLE_TIMEOUT", 0.01)
+
+    async def run():
+        cam = camera.MyloCamera("ip", "dev", None, FakeDownloader())
+        cam.hass = make_hass()
+        cam.update_image(jpeg("current"))
+        transport = FakeTransport()
+
+        async def drive(response):
+            await wait_for_writes(response, 3)
+            # No new frame arrives to notice the disconnect on write
+            transport.closing = True
+
+        return await run_stream(cam, {}, drive, max_writes=100, transport=transport)()
+
+    assert asyncio.run(run()) == [jpeg("current")]
+
+
+def test_mjpeg_stream_replays_history_then_follows(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera, "TIMELAPSE_FRAME_INTERVAL", 0)
+
+    async def run():
+        store = camera.SnapshotStore(str(tmp_path))
+        store.open()
+        now = camera.time.time()
+        store.append(jpeg("too-old"), now - 7200)
+        store.append(jpeg("h1"), now - 1800)
+        store.append(jpeg("h2"), now - 600)
+        cam = camera.MyloCamera("ip", "dev", None, FakeDownloader(), store)
+        cam.hass = make_hass()
+
+        async def drive(response):
+            await wait_for_writes(response, 6)
+            cam.update_image(jpeg("live"))
+            await wait_for_writes(response, 9)
+            cam.update_image(jpeg("later"))
+
+        try:
+            return await run_stream(cam, {"hours": "1"}, drive, max_writes=9)()
+        finally:
+            store.close()
+
+    # The newest archived frame is not repeated when the live part starts
+    assert asyncio.run(run()) == [jpeg("h1"), jpeg("h2"), jpeg("live")]
+
+
+def test_mjpeg_stream_loads_a_frame_when_nothing_is_cached(tmp_path):
+    async def run():
+        store = camera.SnapshotStore(str(tmp_path))
+        store.open()
+        downloader = FakeDownloader(jpeg("downloaded"))
+        cam = camera.MyloCamera("ip", "dev", None, downloader, store)
+        cam.hass = make_hass()
+
+        async def drive(response):
+            await wait_for_writes(response, 3)
+            cam.update_image(jpeg("next"))
+
+        try:
+            frames = await run_stream(cam, {}, drive, max_writes=3)()
+        finally:
+            store.close()
+        return frames, downloader.downloads
+
+    frames, downloads = asyncio.run(run())
+    assert frames == [jpeg("downloaded")]
+    assert downloads == 1
+
+
+class FakeWs:
+    """Websocket client double for the imgready subscription."""
+
+    def __init__(self):
+        self.callback = None
+        self.downloads = 0
+        self.current = False
+
+    def subscribe(self, path, callback):
+        assert path == "/pooldevices/dev/imgready"
+        self.callback = callback
+        return lambda: None
+
+    def snapshot_is_current(self):
+        return self.current
+
+    async def async_download_snapshot(self):
+        self.downloads += 1
+        return jpeg(f"download{self.downloads}")
+
+
+def setup_camera(tmp_path, debounce):
+    """Run the camera platform setup and return ``(hass, ws, camera)``."""
+
+    async def run():
+        hass = make_hass(tmp_path)
+        ws = FakeWs()
+        hass.data[camera.DOMAIN] = {
+            "device_ids": {"e1": "dev"},
+            "ws": {"e1": ws},
+            "snapshots": {"e1": FakeDownloader()},
+        }
+        entry = types.SimpleNamespace(
+            entry_id="e1",
+            data={
+                camera.CONF_IP_ADDRESS: "ip",
+                camera.CONF_REFRESH_TOKEN: "r",
+                camera.CONF_API_KEY: "k",
+            },
+            options={camera.CONF_IMGREADY_DEBOUNCE: debounce},
+            unload=[],
+        )
+        entry.async_on_unload = entry.unload.append
+        entities = []
+        await camera.async_setup_entry(hass, entry, entities.extend)
+        return hass, entry, ws, entities[0]
+
+    return run()
+
+
+async def teardown_camera(hass, entry, cam):
+    for func in entry.unload:
+        func()
+    await hass.async_add_executor_job(cam._store.close)
+    cam._variants.set_source(None)
+    cam._ring.close()
+
+
+def test_imgready_burst_downloads_once(tmp_path):
+    async def run():
+        hass, entry, ws, cam = await setup_camera(tmp_path, 0.05)
+        for n in range(5):
+            await ws.callback({"device": "ha", "time": str(n)})
+        await asyncio.sleep(0.15)
+        shown = bytes(cam._ring.latest()[1])
+        await teardown_camera(hass, entry, cam)
+        return ws.downloads, shown
+
+    downloads, shown = asyncio.run(run())
+    assert downloads == 1
+    assert shown == jpeg("download1")
+
+
+def test_imgready_repeated_payload_is_ignored(tmp_path):
+    async def run():
+        hass, entry, ws, cam = await setup_camera(tmp_path, 0.01)
+        counts = []
+        for payload in ({"time": "1"}, {"time": "1"}, {"time": "2"}):
+            await ws.callback(payload)
+            await asyncio.sleep(0.05)
+            counts.append(ws.downloads)
+        await teardown_camera(hass, entry, cam)
+        return counts
+
+    assert asyncio.run(run()) == [1, 1, 2]
+
+
+def test_imgready_waits_for_configured_window(tmp_path):
+    async def run():
+        hass, entry, ws, cam = await setup_camera(tmp_path, 0.2)
+        await ws.callback({"time": "1"})
+        await asyncio.sleep(0.05)
+        early = ws.downloads
+        await asyncio.sleep(0.25)
+        late = ws.downloads
+        await teardown_camera(hass, entry, cam)
+        return early, late
+
+    assert asyncio.run(run()) == (0, 1)
+
+
+def test_imgready_after_capture_skips_second_download(tmp_path):
+    async def run():
+        hass, entry, ws, cam = await setup_camera(tmp_path, 0.01)
+        # The capture that triggered this push already downloaded the image
+        ws.current = True
+        await ws.callback({"time": "1"})
+        await asyncio.sleep(0.05)
+        await teardown_camera(hass, entry, cam)
+        return ws.downloads
+
+    assert asyncio.run(run()) == 0
+
+
+def test_archive_appends_keep_ring_order(tmp_path):
+    class SlowStore(camera.SnapshotStore):
+        def append(self, image, timestamp=None):
+            if image == jpeg("a"):
+                # The first write lands after the second one was submitted
+                camera.time.sleep(0.05)
+            super().append(image, timestamp)
+
+    async def run():
+        store = SlowStore(str(tmp_path))
+        store.open()
+        cam = camera.MyloCamera("ip", "dev", None, FakeDownloader(), store)
+        cam.hass = make_hass()
+        cam.update_image(jpeg("a"))
+        cam.update_image(jpeg("b"))
+        ringed = [ts for ts, _ in cam._ring.frames(0)]
+        await cam._archive_task
+        archived = store.timestamps(0)
+        frames = [store.frame_at(ts)[1] for ts in archived]
+        await cam.async_will_remove_from_hass()
+        return ringed, archived, frames
+
+    ringed, archived, frames = asyncio.run(run())
+    assert archived == ringed
+    assert frames == [jpeg("a"), jpeg("b")]
+
+
+def test_archive_errors_are_logged(tmp_path, caplog):
+    class FullStore(camera.SnapshotStore):
+        def append(self, image, timestamp=None):
+            raise OSError("No space left on device")
+
+    async def run():
+        store = FullStore(str(tmp_path))
+        store.open()
+        cam = camera.MyloCamera("ip", "dev", None, FakeDownloader(), store)
+        cam.hass = make_hass()
+        cam.update_image(jpeg("a"))
+        await cam.async_will_remove_from_hass()
+
+    asyncio.run(run())
+    assert "No space left on device" in caplog.text
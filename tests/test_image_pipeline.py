@@ -0,0 +1,110 @@
+import os
+import sys
+import struct
+import importlib.util
+import asyncio
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Stand-ins for Home Assistant's camera image helpers
+SUPPORTED_SCALING_FACTORS = [(7, 8), (3, 4), (5, 8), (1, 2), (3, 8), (1, 4), (1, 8)]
+
+
+def find_supported_scaling_factor(width, height, target_width, target_height):
+    for idx, (num, den) in enumerate(SUPPORTED_SCALING_FACTORS):
+        scaled_width, scaled_height = width * num / den, height * num / den
+        if scaled_width == target_width and scaled_height == target_height:
+            return num, den
+        if scaled_width < target_width or scaled_height < target_height:
+            return None if idx == 0 else SUPPORTED_SCALING_FACTORS[idx - 1]
+    return SUPPORTED_SCALING_FACTORS[-1]
+
+
+class FakeTurboJPEG:
+    """Reads the size that ``make_jpeg`` puts after the SOI marker."""
+
+    def decode_header(self, image):
+        if bytes(image[:2]) != b"\xff\xd8":
+            raise OSError("Not a JPEG")
+        width, height = struct.unpack_from(">HH", image, 2)
+        return width, height, 0, 0
+
+
+img_util = types.ModuleType("homeassistant.components.camera.img_util")
+img_util.TurboJPEGSingleton = types.SimpleNamespace(instance=FakeTurboJPEG)
+img_util.find_supported_scaling_factor = find_supported_scaling_factor
+for name in ("homeassistant", "homeassistant.components"):
+    sys.modules.setdefault(name, types.ModuleType(name))
+sys.modules.setdefault(
+    "homeassistant.components.camera",
+    types.ModuleType("homeassistant.components.camera"),
+)
+sys.modules["homeassistant.components.camera.img_util"] = img_util
+
+pipeline_path = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "custom_components",
+    "coral_mylo",
+    "image_pipeline.py",
+)
+spec = importlib.util.spec_from_file_location("image_pipeline", pipeline_path)
+image_pipeline = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(image_pipeline)
+
+
+def make_jpeg(width, height, tag=b""):
+    """Return a JPEG-shaped byte string that ``FakeTurboJPEG`` can size."""
+    return b"\xff\xd8" + struct.pack(">HH", width, height) + tag + b"\xff\xd9"
+
+
+async def run_now(func, *args):
+    await asyncio.sleep(0)
+    return func(*args)
+
+
+def test_jpeg_size():
+    assert image_pipeline.jpeg_size(make_jpeg(1920, 1080)) == (1920, 1080)
+    assert image_pipeline.jpeg_size(b"not a jpeg") is None
+
+
+def test_variant_cache_scales_once_per_factor():
+    calls = []
+
+    def scale(image, factor):
+        calls.append(factor)
+        return image + b"@%d/%d" % factor
+
+    cache = image_pipeline.SnapshotVariantCache(scale)
+    source = make_jpeg(1920, 1080)
+    cache.set_source(source)
+
+    async def run():
+        tiles = await asyncio.gather(
+            *(cache.async_get(run_now, 900, 500) for _ in range(3)),
+            cache.async_get(run_now, 960, 540),
+        )
+        full = await cache.async_get(run_now)
+        return tiles, full
+
+    tiles, full = asyncio.run(run())
+    assert tiles == [source + b"@1/2"] * 4
+    assert full is source
+    assert calls == [(1, 2)]
+
+    cache.set_source(make_jpeg(1920, 1080, b"new"))
+    asyncio.run(cache.async_get(run_now, 900, 500))
+    assert calls == [(1, 2), (1, 2)]
+
+
+def test_variant_cache_is_bounded():
+    cache = image_pipeline.SnapshotVariantCache(lambda image, factor: b"x", maxsize=2)
+    cache.set_source(make_jpeg(800, 800))
+
+    async def run():
+        for size in (700, 400, 100):
+            await cache.async_get(run_now, size, size)
+
+    asyncio.run(run())
+    assert list(cache._variants) == [(1, 2), (1, 8)]
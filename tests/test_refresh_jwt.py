@@ -71,3 +71,148 @@ def test_refresh_jwt_error(monkeypatch):
         utils, "aiohttp", types.SimpleNamespace(ClientSession=failing_session)
     )
     assert asyncio.run(utils.refresh_jwt("r", "k")) is None
+
+
+def test_token_manager_caches_and_coalesces(monkeypatch):
+    calls = []
+
+    async def fake_request(refresh_token, api_key, session=None):
+        calls.append(refresh_token)
+        await asyncio.sleep(0)
+        return {"access_token": f"tok{len(calls)}", "expires_in": "3600"}
+
+    monkeypatch.setattr(utils, "_request_jwt", fake_request)
+
+    async def run():
+        tokens = utils.MyloTokenManager("r", "k")
+        first = await asyncio.gather(*(tokens.async_get_token() for _ in range(5)))
+        again = await tokens.async_get_token()
+        tokens.invalidate()
+        renewed = await tokens.async_get_token()
+        tokens.stop()
+        return first, again, renewed
+
+    first, again, renewed = asyncio.run(run())
+    assert first == ["tok1"] * 5
+    assert again == "tok1"
+    assert renewed == "tok2"
+    assert len(calls) == 2
+
+
+def test_token_manager_refreshes_before_expiry(monkeypatch):
+    calls = []
+
+    async def fake_request(refresh_token, api_key, session=None):
+        calls.append(refresh_token)
+        return {"access_token": f"tok{len(calls)}", "expires_in": "0.05"}
+
+    monkeypatch.setattr(utils, "_request_jwt", fake_request)
+
+    async def run():
+        tokens = utils.MyloTokenManager("r", "k", margin=0.04)
+        await tokens.async_get_token()
+        # The background timer renews the token without any caller asking
+        await asyncio.sleep(0.03)
+        tokens.stop()
+
+    asyncio.run(run())
+    assert len(calls) >= 2
+
+
+def test_token_manager_failed_refresh_is_not_cached(monkeypatch):
+    async def fake_request(refresh_token, api_key, session=None):
+        return None
+
+    monkeypatch.setattr(utils, "_request_jwt", fake_request)
+
+    async def run():
+        tokens = utils.MyloTokenManager("r", "k")
+        return await tokens.async_get_token()
+
+    assert asyncio.run(run()) is None
+
+
+def test_token_manager_clamps_margin_for_short_lived_tokens(monkeypatch):
+    calls = []
+    lifetimes = ["60", "0"]
+
+    async def fake_request(refresh_token, api_key, session=None):
+        calls.append(refresh_token)
+        return {"access_token": f"tok{len(calls)}", "expires_in": lifetimes.pop(0)}
+
+    monkeypatch.setattr(utils, "_request_jwt", fake_request)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        tokens = utils.MyloTokenManager("r", "k")
+        await tokens.async_get_token()
+        await asyncio.sleep(0.05)
+        # A 60 s token with the 300 s default margin renews halfway through
+        short = tokens._timer.when() - loop.time()
+        cached = await tokens.async_get_token()
+        await tokens.async_refresh()
+        # A nonsensical lifetime falls back to the default one
+        fallback = tokens._timer.when() - loop.time()
+        tokens.stop()
+        return short, cached, fallback
+
+    short, cached, fallback = asyncio.run(run())
+    assert 29 < short <= 30
+    assert cached == "tok1"
+    assert len(calls) == 2
+    assert 3299 < fallback <= 3300
+
+
+def test_token_manager_keeps_valid_token_when_renewal_fails(monkeypatch):
+    responses = [
+        {"access_token": "tok1", "expires_in": "0.2"},
+        None,
+        {"access_token": "tok2", "expires_in": "3600"},
+    ]
+    calls = []
+
+    async def fake_request(refresh_token, api_key, session=None):
+        calls.append(refresh_token)
+        return responses.pop(0) if responses else None
+
+    monkeypatch.setattr(utils, "_request_jwt", fake_request)
+
+    async def run():
+        tokens = utils.MyloTokenManager("r", "k", margin=0.1)
+        tokens._retry = utils.ExponentialBackoff(0.03, 0.03)
+        await tokens.async_get_token()
+        # The background renewal at 0.1 s fails
+        await asyncio.sleep(0.11)
+        during = await tokens.async_get_token()
+        armed = tokens._timer is not None
+        # The retry renews the token before the old one expires
+        await asyncio.sleep(0.05)
+        after = await tokens.async_get_token()
+        tokens.stop()
+        return during, armed, after
+
+    during, armed, after = asyncio.run(run())
+    assert during == "tok1"
+    assert armed
+    assert after == "tok2"
+    assert len(calls) == 3
+
+
+def test_token_manager_drops_expired_token_when_renewal_fails(monkeypatch):
+    responses = [{"access_token": "tok1", "expires_in": "0.05"}]
+
+    async def fake_request(refresh_token, api_key, session=None):
+        return responses.pop(0) if responses else None
+
+    monkeypatch.setattr(utils, "_request_jwt", fake_request)
+
+    async def run():
+        tokens = utils.MyloTokenManager("r", "k", margin=0.01)
+        tokens._retry = utils.ExponentialBackoff(1, 1)
+        await tokens.async_get_token()
+        await asyncio.sleep(0.06)
+        token = await tokens.async_get_token()
+        tokens.stop()
+        return token
+
+    assert asyncio.run(run()) is None
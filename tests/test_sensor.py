@@ -56,12 +56,82 @@ helpers_entity = types.ModuleType("homeassistant.helpers.entity")
 
 
 class Entity:  # Minimal base class
-    pass
+    async def async_added_to_hass(self):
+        pass
+
+    def async_on_remove(self, func):
+        self._on_remove = getattr(self, "_on_remove", [])
+        self._on_remove.append(func)
 
 
 helpers_entity.Entity = Entity
 sys.modules["homeassistant.helpers.entity"] = helpers_entity
 
+core_module = types.ModuleType("homeassistant.core")
+core_module.callback = lambda func: func
+sys.modules.setdefault("homeassistant.core", core_module)
+
+update_coordinator = types.ModuleType("homeassistant.helpers.update_coordinator")
+
+
+class UpdateFailed(Exception):
+    pass
+
+
+class DataUpdateCoordinator:
+    """Simplified stand-in for Home Assistant's DataUpdateCoordinator."""
+
+    def __init__(self, hass, logger, *, name, update_interval=None):
+        self.hass = hass
+        self.logger = logger
+        self.name = name
+        self.update_interval = update_interval
+        self.data = None
+        self.last_update_success = True
+        self._listeners = {}
+
+    def async_add_listener(self, update_callback, context=None):
+        self._listeners[update_callback] = context
+        return lambda: self._listeners.pop(update_callback, None)
+
+    def async_contexts(self):
+        return (ctx for ctx in self._listeners.values() if ctx is not None)
+
+    async def async_refresh(self):
+        try:
+            self.data = await self._async_update_data()
+            self.last_update_success = True
+        except UpdateFailed:
+            self.last_update_success = False
+
+    async def async_shutdown(self):
+        pass
+
+
+class CoordinatorEntity(Entity):
+    """Simplified stand-in for Home Assistant's CoordinatorEntity."""
+
+    def __init__(self, coordinator, context=None):
+        self.coordinator = coordinator
+        self.coordinator_context = context
+
+    async def async_added_to_hass(self):
+        self.coordinator.async_add_listener(
+            self._handle_coordinator_update, self.coordinator_context
+        )
+
+    def _handle_coordinator_update(self):
+        self.async_write_ha_state()
+
+    def async_write_ha_state(self):
+        self.writes = getattr(self, "writes", 0) + 1
+
+
+update_coordinator.DataUpdateCoordinator = DataUpdateCoordinator
+update_coordinator.CoordinatorEntity = CoordinatorEntity
+update_coordinator.UpdateFailed = UpdateFailed
+sys.modules["homeassistant.helpers.update_coordinator"] = update_coordinator
+
 sys.modules.setdefault(
     "homeassistant.components", types.ModuleType("homeassistant.components")
 )
@@ -138,11 +208,19 @@ sensor = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(sensor)
 
 
+def make_coordinator(data=None):
+    """Return a StatsD coordinator for device ``dev1`` with optional data."""
+
+    coordinator = sensor.MyloStatsdCoordinator(None, "1.2.3.4", "dev1")
+    coordinator.data = data
+    return coordinator
+
+
 def test_mylo_sensor_uses_native_units():
     """Ensure MyloSensor exposes native unit attributes."""
 
     mylo = sensor.MyloSensor(
-        "1.2.3.4",
+        make_coordinator(),
         "dev1",
         "water.temperature",
         "Water Temperature",
@@ -161,7 +239,7 @@ def test_device_classes_assigned():
     """Ensure sensors are created with appropriate device classes."""
 
     wind = sensor.MyloSensor(
-        "1.2.3.4",
+        make_coordinator(),
         "dev1",
         "weather.wind_kph",
         "Wind Speed",
@@ -172,7 +250,7 @@ def test_device_classes_assigned():
     assert wind.native_unit_of_measurement == "km/h"
 
     pressure = sensor.MyloSensor(
-        "1.2.3.4",
+        make_coordinator(),
         "dev1",
         "weather.pressure_mb",
         "Atmospheric Pressure",
@@ -183,7 +261,7 @@ def test_device_classes_assigned():
     assert pressure.native_unit_of_measurement == "mbar"
 
     pm10 = sensor.MyloSensor(
-        "1.2.3.4",
+        make_coordinator(),
         "dev1",
         "weather.aq_pm10",
         "Air Quality PM10",
@@ -193,7 +271,7 @@ def test_device_classes_assigned():
     assert pm10.device_class == const_module.SensorDeviceClass.PM10
 
     precip = sensor.MyloSensor(
-        "1.2.3.4",
+        make_coordinator(),
         "dev1",
         "weather.precip_mm.count",
         "Precipitation",
@@ -204,7 +282,7 @@ def test_device_classes_assigned():
     assert precip.native_unit_of_measurement == "mm"
 
     lag = sensor.MyloSensor(
-        "1.2.3.4",
+        make_coordinator(),
         "dev1",
         "statsd.timestamp_lag",
         "StatsD Timestamp Lag",
@@ -310,11 +388,12 @@ def test_memory_usage_parses_components():
     }
 
 
-def test_statsd_metric_without_device_prefix(monkeypatch):
-    """StatsD metrics should be queried without a device prefix."""
+def test_statsd_metric_without_device_prefix():
+    """StatsD metrics should be looked up without a device prefix."""
 
+    coordinator = make_coordinator()
     lag = sensor.MyloSensor(
-        "1.2.3.4",
+        coordinator,
         "dev1",
         "statsd.timestamp_lag",
         "StatsD Timestamp Lag",
@@ -322,19 +401,189 @@ def test_statsd_metric_without_device_prefix(monkeypatch):
         const_module.SensorDeviceClass.DURATION,
     )
 
-    class FakeHass:
-        async def async_add_executor_job(self, func, *args):
-            return func(*args)
+    coordinator.data = {"statsd.timestamp_lag": 12, "coral.dev1.statsd.x": 1}
+    lag._handle_coordinator_update()
+
+    assert lag.native_value == 12
+
+
+class FakeConnection:
+    """Stand-in for the persistent StatsD admin connection."""
+
+    def __init__(self, gauges):
+        self.gauges = gauges
+        self.commands = []
+        self.keys = []
+
+    async def request(self, command, prefix=None, keys=None):
+        self.commands.append(command)
+        self.keys.append(keys)
+        if keys is None:
+            return self.gauges
+        return {k: v for k, v in self.gauges.items() if k in keys}
+
+
+def test_coordinator_fetches_gauges_once_for_all_sensors():
+    """One StatsD read feeds every sensor sharing the coordinator."""
+
+    coordinator = make_coordinator()
+    coordinator._connection = FakeConnection(
+        {"coral.dev1.water.temperature": 24.5, "coral.dev1.robot.count": 3}
+    )
+    temp = sensor.MyloSensor(
+        coordinator, "dev1", "water.temperature", "Water Temperature", None
+    )
+    robots = sensor.MyloSensor(coordinator, "dev1", "robot.count", "Robot Count", None)
+
+    asyncio.run(coordinator.async_refresh())
+    temp._handle_coordinator_update()
+    robots._handle_coordinator_update()
+
+    assert coordinator._connection.commands == ["gauges"]
+    assert temp.native_value == 24.5
+    assert robots.native_value == 3
+
+
+def test_coordinator_decodes_only_subscribed_gauges():
+    """Only gauges used by registered sensors are requested."""
+
+    coordinator = make_coordinator()
+    coordinator._connection = FakeConnection(
+        {
+            "coral.dev1.water.temperature": 24.5,
+            "coral.dev1.robot.count": 3,
+            "statsd.timestamp_lag": 1,
+        }
+    )
+    asyncio.run(coordinator.async_refresh())
+    assert coordinator._connection.keys == [None]
+
+    temp = sensor.MyloSensor(
+        coordinator, "dev1", "water.temperature", "Water Temperature", None
+    )
+    lag = sensor.MyloSensor(coordinator, "dev1", "statsd.timestamp_lag", "Lag", None)
+    asyncio.run(temp.async_added_to_hass())
+    asyncio.run(lag.async_added_to_hass())
+    asyncio.run(coordinator.async_refresh())
+
+    assert coordinator._connection.keys[-1] == {
+        "coral.dev1.water.temperature",
+        "statsd.timestamp_lag",
+    }
+    assert coordinator.data == {
+        "coral.dev1.water.temperature": 24.5,
+        "statsd.timestamp_lag": 1,
+    }
+
 
-    lag.hass = FakeHass()
+def test_coordinator_adapts_interval_per_metric(monkeypatch):
+    """Steady gauges back off while changing ones are polled faster."""
 
+    clock = [0.0]
+    coordinator_module = sys.modules["custom_components.coral_mylo.coordinator"]
     monkeypatch.setattr(
-        sensor, "read_gauges_from_statsd", lambda ip: {"statsd.timestamp_lag": 12}
+        coordinator_module, "time", types.SimpleNamespace(monotonic=lambda: clock[0])
+    )
+    coordinator = sensor.MyloStatsdCoordinator(
+        None,
+        "1.2.3.4",
+        "dev1",
+        {"water.temperature": [30, 60], "robot.count": [30, 300]},
+    )
+    gauges = {"coral.dev1.water.temperature": 24.5, "coral.dev1.robot.count": 3}
+    coordinator._connection = FakeConnection(gauges)
+    for metric in ("water.temperature", "robot.count"):
+        entity = sensor.MyloSensor(coordinator, "dev1", metric, metric, None)
+        asyncio.run(entity.async_added_to_hass())
+
+    asyncio.run(coordinator.async_refresh())
+    assert coordinator.update_interval.total_seconds() == 30
+
+    # Nothing is due yet, so no request goes to the device
+    clock[0] = 10
+    asyncio.run(coordinator.async_refresh())
+    assert len(coordinator._connection.commands) == 1
+    assert coordinator.data == gauges
+
+    # Temperature changes, robot count does not
+    clock[0] = 30
+    gauges["coral.dev1.water.temperature"] = 25.0
+    asyncio.run(coordinator.async_refresh())
+    temp = coordinator._schedules["coral.dev1.water.temperature"]
+    robots = coordinator._schedules["coral.dev1.robot.count"]
+    assert temp.interval == 30
+    assert robots.interval == 45
+    assert coordinator.data["coral.dev1.water.temperature"] == 25.0
+
+    clock[0] = 60
+    asyncio.run(coordinator.async_refresh())
+    assert coordinator._connection.keys[-1] == {"coral.dev1.water.temperature"}
+    assert temp.interval == 45
+
+    clock[0] = 105
+    for _ in range(5):
+        asyncio.run(coordinator.async_refresh())
+        clock[0] += 300
+    assert temp.interval == 60
+    assert robots.interval == 300
+
+
+def test_statsd_sensor_keeps_last_value_when_gauge_missing():
+    """A missing gauge leaves the previous value in place."""
+
+    coordinator = make_coordinator({"coral.dev1.darkness": 40})
+    dark = sensor.MyloSensor(coordinator, "dev1", "darkness", "Darkness", None)
+    assert dark.native_value == 40
+
+    coordinator.data = {}
+    dark._handle_coordinator_update()
+    assert dark.native_value == 40
+
+
+def test_statsd_sensor_writes_only_on_change():
+    """Polls that leave the value within its deadband do not write state."""
+
+    coordinator = make_coordinator({"coral.dev1.water.temperature": 24.0})
+    temp = sensor.MyloSensor(
+        coordinator, "dev1", "water.temperature", "Water Temperature", None, None, 0.1
     )
+    temp._handle_coordinator_update()
+    assert temp.writes == 1
 
-    asyncio.run(lag.async_update())
+    coordinator.data = {"coral.dev1.water.temperature": 24.05}
+    temp._handle_coordinator_update()
+    assert temp.writes == 1
+    assert temp.native_value == 24.0
+
+    coordinator.data = {"coral.dev1.water.temperature": 24.5}
+    temp._handle_coordinator_update()
+    assert temp.writes == 2
+    assert temp.native_value == 24.5
+
+    # Losing the device is always written so the entity turns unavailable
+    coordinator.last_update_success = False
+    temp._handle_coordinator_update()
+    assert temp.writes == 3
 
-    assert lag.native_value == 12
+
+def test_realtime_sensor_skips_redundant_writes():
+    """Repeated websocket values do not trigger state writes."""
+
+    class Battery(sensor.MyloRealtimeSensor):
+        writes = 0
+        hass = object()
+
+        def async_write_ha_state(self):
+            self.writes += 1
+
+    battery = Battery("dev1", "Battery", "/status/battery", None, deadband=1)
+    asyncio.run(battery.update_from_ws(80))
+    asyncio.run(battery.update_from_ws(80))
+    asyncio.run(battery.update_from_ws(80.5))
+    assert battery.writes == 1
+    asyncio.run(battery.update_from_ws(79))
+    assert battery.writes == 2
+    assert battery.native_value == 79
 
 
 def test_pool_state_sensor_maps_codes():
@@ -377,3 +626,55 @@ def test_pool_state_sensor_handles_dict_of_entries():
         )
     )
     assert ps.native_value == "in_pool"
+
+
+def test_realtime_sensor_subscribes_for_its_lifetime():
+    """The websocket subscription follows the entity's lifecycle."""
+
+    class FakeWs:
+        def __init__(self):
+            self.subscribed = []
+
+        def subscribe(self, path, callback):
+            self.subscribed.append(path)
+            return lambda: self.subscribed.remove(path)
+
+    ws = FakeWs()
+    ping = sensor.MyloRealtimeSensor("dev1", "Ping", "/status/system_ping", ws)
+    asyncio.run(ping.async_added_to_hass())
+    assert ws.subscribed == [ping._path]
+    for remove in ping._on_remove:
+        remove()
+    assert ws.subscribed == []
+
+
+def test_throttled_realtime_sensor_subscribes_through_throttle():
+    """A sensor with a minimum interval receives updates via its throttle."""
+
+    class FakeWs:
+        def __init__(self):
+            self.callbacks = []
+
+        def subscribe(self, path, callback):
+            self.callbacks.append(callback)
+            return lambda: self.callbacks.remove(callback)
+
+    async def run():
+        ws = FakeWs()
+        ping = sensor.MyloRealtimeSensor(
+            "dev1", "CPU", "/status/temperature/cpu", ws, min_interval=30
+        )
+        loop = asyncio.get_running_loop()
+        ping.hass = types.SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        ping.async_write_ha_state = lambda: None
+        await ping.async_added_to_hass()
+        await ws.callbacks[0](40)
+        await ws.callbacks[0](41)
+        value = ping.native_value
+        for remove in ping._on_remove:
+            remove()
+        return value, ws.callbacks
+
+    value, callbacks = asyncio.run(run())
+    assert value == 40
+    assert callbacks == []
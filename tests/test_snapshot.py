@@ -19,9 +19,10 @@ spec.loader.exec_module(utils)
 
 
 class FakeResponse:
-    def __init__(self, data=b"", status=200):
+    def __init__(self, data=b"", status=200, headers=None):
         self._data = data
         self.status = status
+        self.headers = headers or {}
 
     async def read(self):
         return self._data
@@ -77,3 +78,131 @@ def test_download_latest_snapshot_failure(monkeypatch):
     monkeypatch.setattr(utils, "refresh_jwt", fake_refresh)
     data = asyncio.run(utils.download_latest_snapshot("id", "r", "k"))
     assert data is None
+
+
+class RecordingSession:
+    """Session double that answers every request and records the URLs."""
+
+    def __init__(self):
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append(("post", url))
+        return JsonResponse({"access_token": "jwt"})
+
+    def get(self, url, **kwargs):
+        self.calls.append(("get", url))
+        if "alt=media" in url:
+            return FakeResponse(b"image")
+        return JsonResponse({"downloadTokens": "tok"})
+
+
+class JsonResponse(FakeResponse):
+    def __init__(self, data):
+        super().__init__()
+        self._json = data
+
+    async def json(self):
+        return self._json
+
+
+def test_download_latest_snapshot_reuses_session(monkeypatch):
+    def no_new_sessions():
+        raise AssertionError("a new ClientSession was created")
+
+    monkeypatch.setattr(
+        utils, "aiohttp", types.SimpleNamespace(ClientSession=no_new_sessions)
+    )
+    session = RecordingSession()
+    data = asyncio.run(utils.download_latest_snapshot("id", "r", "k", session=session))
+    assert data == b"image"
+    assert [method for method, _ in session.calls] == ["post", "get", "get"]
+
+
+class RotatingSession(RecordingSession):
+    """Session double whose media GET rejects stale download tokens."""
+
+    def __init__(self):
+        super().__init__()
+        self.valid = "tok"
+
+    def get(self, url, **kwargs):
+        self.calls.append(("get", url))
+        if "alt=media" in url:
+            if url.endswith(f"token={self.valid}"):
+                return FakeResponse(b"image")
+            return FakeResponse(status=403)
+        return JsonResponse({"downloadTokens": self.valid})
+
+
+def test_downloader_reuses_download_token():
+    session = RotatingSession()
+    downloader = utils.MyloSnapshotDownloader("id", "r", "k", session=session)
+
+    async def run():
+        return [await downloader.async_download() for _ in range(3)]
+
+    assert asyncio.run(run()) == [b"image"] * 3
+    # One JWT exchange and token lookup, then a single GET per snapshot
+    assert [method for method, _ in session.calls] == ["post"] + ["get"] * 4
+
+
+def test_downloader_refetches_rejected_token_once():
+    session = RotatingSession()
+    downloader = utils.MyloSnapshotDownloader("id", "r", "k", session=session)
+
+    async def run():
+        await downloader.async_download()
+        session.valid = "tok2"
+        session.calls.clear()
+        return await downloader.async_download()
+
+    assert asyncio.run(run()) == b"image"
+    media = [url for _, url in session.calls if "alt=media" in url]
+    assert [url.rsplit("=", 1)[1] for url in media] == ["tok", "tok2"]
+
+
+class ConditionalSession(RecordingSession):
+    """Session double that honours If-None-Match on the media GET."""
+
+    def __init__(self):
+        super().__init__()
+        self.etag = '"v1"'
+        self.sent = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.calls.append(("get", url))
+        if "alt=media" not in url:
+            return JsonResponse({"downloadTokens": "tok"})
+        self.sent.append((headers or {}).get("If-None-Match"))
+        if self.sent[-1] == self.etag:
+            return FakeResponse(status=304)
+        return FakeResponse(b"image-" + self.etag.encode(), headers={"ETag": self.etag})
+
+
+def test_downloader_conditional_get():
+    session = ConditionalSession()
+    downloader = utils.MyloSnapshotDownloader("id", "r", "k", session=session)
+
+    async def run():
+        first = await downloader.async_download()
+        second = await downloader.async_download()
+        session.etag = '"v2"'
+        third = await downloader.async_download()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert session.sent == [None, '"v1"', '"v1"']
+    assert first == b'image-"v1"'
+    # Unchanged snapshots are not handed out again
+    assert second is None
+    assert third == b'image-"v2"'
+
+    downloader.forget_snapshot()
+    assert asyncio.run(downloader.async_download()) == b'image-"v2"'
+    assert session.sent[-1] is None
+
+
+def test_snapshot_digest_detects_changes():
+    assert utils.snapshot_digest(b"a") == utils.snapshot_digest(b"a")
+    assert utils.snapshot_digest(b"a") != utils.snapshot_digest(b"b")
@@ -0,0 +1,111 @@
+import os
+import sys
+import importlib.util
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+store_path = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "custom_components",
+    "coral_mylo",
+    "snapshot_store.py",
+)
+spec = importlib.util.spec_from_file_location("snapshot_store", store_path)
+snapshot_store = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(snapshot_store)
+
+
+def open_store(path, **kwargs):
+    store = snapshot_store.SnapshotStore(str(path), **kwargs)
+    store.open()
+    return store
+
+
+def test_store_lookup_by_time(tmp_path):
+    store = open_store(tmp_path)
+    for ts in (100, 200, 300):
+        store.append(b"frame%d" % ts, timestamp=ts)
+
+    assert store.latest() == (300, b"frame300")
+    assert store.frame_at(250) == (200, b"frame200")
+    assert store.frame_at(200) == (200, b"frame200")
+    assert store.frame_at(50) is None
+    assert store.timestamps(150, 300) == [200, 300]
+    store.close()
+
+
+def test_store_survives_restart_and_torn_write(tmp_path):
+    store = open_store(tmp_path)
+    store.append(b"first", timestamp=1)
+    store.append(b"second", timestamp=2)
+    store.close()
+    with open(tmp_path / snapshot_store.ARCHIVE_FILE, "ab") as f:
+        f.write(b"MYLO\x00\x00")
+
+    store = open_store(tmp_path)
+    assert len(store) == 2
+    assert store.latest() == (2, b"second")
+    store.append(b"third", timestamp=3)
+    store.close()
+
+    store = open_store(tmp_path)
+    assert store.timestamps() == [1, 2, 3]
+    store.close()
+
+
+def test_store_retention_by_size(tmp_path):
+    frame = b"x" * 100
+    store = open_store(tmp_path, max_bytes=1000)
+    for ts in range(20):
+        store.append(frame, timestamp=ts)
+        assert store.size <= 1000
+
+    assert store.latest() == (19, frame)
+    assert store.frame_at(0) is None
+    assert os.path.getsize(tmp_path / snapshot_store.ARCHIVE_FILE) == store.size
+    store.close()
+
+
+def test_store_retention_by_age(tmp_path):
+    store = open_store(tmp_path, max_age=100)
+    for ts in range(0, 300, 10):
+        store.append(b"f", timestamp=ts)
+
+    # Expired frames are dropped in small batches, never far past the limit
+    assert 170 <= store.timestamps()[0] <= 190
+    assert store.latest() == (290, b"f")
+    store.close()
+
+    store = open_store(tmp_path, max_age=100)
+    assert store.timestamps()[-1] == 290
+    store.close()
+
+
+def test_ring_evicts_oldest_and_returns_views():
+    ring = snapshot_store.SnapshotRing(capacity=100)
+    for ts in range(10):
+        assert ring.append(bytes([ts]) * 30, timestamp=ts)
+
+    frames = ring.frames()
+    assert [ts for ts, _ in frames] == [7, 8, 9]
+    assert all(isinstance(view, memoryview) for _, view in frames)
+    assert [bytes(view) for _, view in frames] == [bytes([ts]) * 30 for ts in (7, 8, 9)]
+    assert ring.frames(start=8, end=8)[0][0] == 8
+    assert bytes(ring.get(8)) == bytes([8]) * 30
+    assert ring.get(3) is None
+    assert not ring.append(b"x" * 101)
+    ring.close()
+
+
+def test_ring_wraps_without_corrupting_frames():
+    ring = snapshot_store.SnapshotRing(capacity=100)
+    written = []
+    for ts, size in enumerate([40, 50, 30, 60, 10, 45, 5, 90, 20]):
+        data = bytes([ts]) * size
+        ring.append(data, timestamp=ts)
+        written.append((ts, data))
+        kept = [(t, bytes(view)) for t, view in ring.frames()]
+        assert kept == written[len(written) - len(kept) :]
+        assert ring.latest()[0] == ts
+    ring.close()
@@ -2,6 +2,7 @@ import os
 import sys
 import types
 import importlib.util
+import asyncio
 from unittest.mock import patch
 
 # Provide dummy aiohttp module before loading utils
@@ -20,51 +21,273 @@ utils = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(utils)
 
 
-class FakeSocket:
-    def __init__(self, responses):
-        self._responses = list(responses)
+class FakeWriter:
+    def __init__(self):
         self.sent = []
+        self.closed = False
 
-    def sendall(self, data):
+    def write(self, data):
         self.sent.append(data)
 
-    def recv(self, bufsize):
-        return self._responses.pop(0) if self._responses else b""
+    async def drain(self):
+        pass
 
     def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
         pass
 
-    def __enter__(self):
-        return self
 
-    def __exit__(self, exc_type, exc, tb):
-        pass
+def fake_open_connection(responses, writer):
+    async def _open(host, port):
+        reader = asyncio.StreamReader()
+        for chunk in responses:
+            reader.feed_data(chunk)
+        reader.feed_eof()
+        return reader, writer
+
+    return _open
+
+
+def test_async_statsd_commands():
+    writer = FakeWriter()
+    responses = [b"{ 'coral.1.metric': 1,\n  'statsd.timestamp_lag': 0 }\nEND\n\n"]
+    with patch.object(
+        utils.asyncio, "open_connection", fake_open_connection(responses, writer)
+    ):
+        gauges = asyncio.run(utils.async_read_gauges_from_statsd("1.2.3.4"))
+    assert gauges == {"coral.1.metric": 1, "statsd.timestamp_lag": 0}
+    assert writer.sent == [b"gauges\n"]
+    assert writer.closed
+
+    writer = FakeWriter()
+    responses = [b"{ 'coral.1.loop': [ 1, 2.5 ] }\nEN", b"D\n\n"]
+    with patch.object(
+        utils.asyncio, "open_connection", fake_open_connection(responses, writer)
+    ):
+        timers = asyncio.run(utils.async_read_timers_from_statsd("1.2.3.4"))
+    assert timers == {"coral.1.loop": [1, 2.5]}
+    assert writer.sent == [b"timers\n"]
+
+
+def test_async_statsd_command_reads_large_dump():
+    writer = FakeWriter()
+    entries = ", ".join(f"'coral.1.gauge{i}': {i}" for i in range(6000))
+    dump = f"{{ {entries} }}\nEND\n\n".encode()
+    assert len(dump) > 64 * 1024
+    # Deliver it the way a socket would, in pieces
+    responses = [dump[i : i + 1500] for i in range(0, len(dump), 1500)]
+    with patch.object(
+        utils.asyncio, "open_connection", fake_open_connection(responses, writer)
+    ):
+        gauges = asyncio.run(utils.async_statsd_command("1.2.3.4", "gauges"))
+    assert len(gauges) == 6000
+    assert gauges["coral.1.gauge5999"] == 5999
+
+
+def test_async_read_statsd_error():
+    async def failing_open(host, port):
+        raise OSError("unreachable")
+
+    with patch.object(utils.asyncio, "open_connection", failing_open):
+        assert asyncio.run(utils.async_read_counters_from_statsd("1.2.3.4")) == {}
+
+
+def test_async_discover_device_id_from_statsd():
+    async def fake_read(ip, command, prefix=None):
+        assert (command, prefix) == ("gauges", "coral.")
+        return {"coral.42.water.level": 3}
+
+    with patch.object(utils, "async_read_statsd", fake_read):
+        assert asyncio.run(utils.async_discover_device_id_from_statsd("ip")) == "42"
+
+
+class FakeStatsdServer:
+    """Tiny admin server answering each command line with a gauge dump."""
+
+    def __init__(self):
+        self.connections = 0
+        self.commands = []
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        while line := await reader.readline():
+            command = line.decode().strip()
+            self.commands.append(command)
+            if command == "quit":
+                break
+            writer.write(f"{{ '{command}.value': {len(self.commands)} }}\n".encode())
+            writer.write(b"END\n\n")
+            await writer.drain()
+        writer.close()
+
+
+def test_statsd_admin_connection_pipelines_requests():
+    async def run():
+        server = FakeStatsdServer()
+        await server.start()
+        conn = utils.StatsdAdminConnection("127.0.0.1", port=server.port)
+        results = await asyncio.gather(
+            conn.request("gauges"), conn.request("counters"), conn.request("timers")
+        )
+        again = await conn.request("gauges")
+        await conn.close()
+        await server.stop()
+        return server, results, again
+
+    server, results, again = asyncio.run(run())
+    assert results == [{"gauges.value": 1}, {"counters.value": 2}, {"timers.value": 3}]
+    assert again == {"gauges.value": 4}
+    assert server.connections == 1
+
+
+def test_statsd_admin_connection_reads_large_dump():
+    class LargeDumpServer(FakeStatsdServer):
+        async def _handle(self, reader, writer):
+            self.connections += 1
+            while line := await reader.readline():
+                command = line.decode().strip()
+                self.commands.append(command)
+                entries = ", ".join(f"'{command}.{i}': {i}" for i in range(6000))
+                writer.write(f"{{ {entries} }}\nEND\n\n".encode())
+                await writer.drain()
+            writer.close()
+
+    async def run():
+        server = LargeDumpServer()
+        await server.start()
+        conn = utils.StatsdAdminConnection("127.0.0.1", port=server.port)
+        results = await asyncio.gather(conn.request("gauges"), conn.request("timers"))
+        await conn.close()
+        await server.stop()
+        return server, results
+
+    server, (gauges, timers) = asyncio.run(run())
+    assert len(gauges) == len(timers) == 6000
+    assert gauges["gauges.5999"] == 5999
+    assert timers["timers.0"] == 0
+    assert server.connections == 1
+
+
+def test_statsd_admin_connection_reconnects_after_close():
+    async def run():
+        server = FakeStatsdServer()
+        await server.start()
+        conn = utils.StatsdAdminConnection("127.0.0.1", port=server.port)
+        await conn.request("gauges")
+        # Server side hangs up; the next request must use a fresh socket
+        try:
+            await conn.request("quit")
+        except Exception:
+            pass
+        await asyncio.sleep(0)
+        result = await conn.request("gauges")
+        await conn.close()
+        await server.stop()
+        return server, result
+
+    server, result = asyncio.run(run())
+    assert result == {"gauges.value": 3}
+    assert server.connections == 2
+
+
+def test_statsd_admin_connection_backs_off_after_failure():
+    attempts = []
+
+    async def failing_open(host, port):
+        attempts.append(host)
+        raise OSError("refused")
+
+    async def run():
+        conn = utils.StatsdAdminConnection("1.2.3.4")
+        errors = []
+        for _ in range(3):
+            try:
+                await conn.request("gauges")
+            except ConnectionError as e:
+                errors.append(e)
+        return errors
+
+    with patch.object(utils.asyncio, "open_connection", failing_open):
+        errors = asyncio.run(run())
+    assert len(errors) == 3
+    assert attempts == ["1.2.3.4"]
+
+
+def test_exponential_backoff():
+    backoff = utils.ExponentialBackoff(initial=1, maximum=5)
+    assert [backoff.next_delay() for _ in range(5)] == [1, 2, 4, 5, 5]
+    backoff.reset()
+    assert backoff.next_delay() == 1
+
+
+def test_statsd_response_buffer():
+    buffer = utils.StatsdResponseBuffer()
+    assert not buffer.feed(b"{ a: 1 }\n")
+    assert not buffer.feed(b"EN")
+    assert buffer.feed(b"D\n\n")
+    assert buffer.response == b"{ a: 1 }"
 
 
-def test_discover_device_id_from_statsd():
-    gauges = {"coral.42.water.temperature": 24.0}
-    with patch.object(utils, "read_gauges_from_statsd", return_value=gauges):
-        assert utils.discover_device_id_from_statsd("1.2.3.4") == "42"
-    with patch.object(utils, "read_gauges_from_statsd", return_value={}):
-        assert utils.discover_device_id_from_statsd("1.2.3.4") is None
+def test_statsd_response_buffer_keeps_following_responses():
+    buffer = utils.StatsdResponseBuffer()
+    assert buffer.feed(b"{ a: 1 }\nEND\n\n{ b: 2 }\nEND\n\n{ c")
+    assert buffer.take() == b"{ a: 1 }"
+    # The second response arrived in the same chunk
+    assert buffer.complete
+    assert buffer.take() == b"\n\n{ b: 2 }"
+    assert not buffer.complete
+    assert not buffer.feed(b": 3 }\nE")
+    assert buffer.feed(b"ND\n\n")
+    assert utils.parse_statsd_dump(buffer.take()) == {"c": 3}
 
 
-def test_read_gauges_from_statsd_success():
-    responses = [b"{'coral.1.metric': 1}\nEND"]
-    fake_socket = FakeSocket(responses)
-    with patch("socket.create_connection", return_value=fake_socket):
-        gauges = utils.read_gauges_from_statsd("1.2.3.4")
-    assert gauges == {"coral.1.metric": 1}
-    assert fake_socket.sent == [b"gauges\n"]
+def test_parse_statsd_dump_inspect_output():
+    dump = (
+        b"{ 'statsd.timestamp_lag': -0.5,\n"
+        b"  'coral.1.last_seen': '2025-07-29T12:00:00Z',\n"
+        b"  \"coral.1.it's\": 'a \\'quoted\\' value',\n"
+        b"  bare_key: 1e3,\n"
+        b"  'coral.1.loop': [ 1, 2, { nested: [ 'x' ] } ],\n"
+        b"  'coral.1.flags': { on: true, off: false, none: null, nan: NaN } }\n"
+        b"END\n\n"
+    )
+    gauges = utils.parse_statsd_dump(dump)
+    assert gauges["statsd.timestamp_lag"] == -0.5
+    assert gauges["coral.1.last_seen"] == "2025-07-29T12:00:00Z"
+    assert gauges["coral.1.it's"] == "a 'quoted' value"
+    assert gauges["bare_key"] == 1000.0
+    assert gauges["coral.1.loop"] == [1, 2, {"nested": ["x"]}]
+    flags = gauges["coral.1.flags"]
+    assert flags["on"] is True and flags["off"] is False and flags["none"] is None
 
 
-def test_read_gauges_from_statsd_error():
-    with patch("socket.create_connection", side_effect=OSError):
-        gauges = utils.read_gauges_from_statsd("1.2.3.4")
-    assert gauges == {}
+def test_parse_statsd_dump_prefix():
+    dump = (
+        "{ 'statsd.timestamp_lag': 0, 'other.timers': [ 1, ']' ],"
+        " 'other.s': 'x}y', 'coral.7.water.level': 12 }"
+    )
+    assert utils.parse_statsd_dump(dump, prefix="coral.7.") == {
+        "coral.7.water.level": 12
+    }
+    assert utils.parse_statsd_dump("") == {}
 
 
-def test_get_statsd_gauge_value(monkeypatch):
-    monkeypatch.setattr(utils, "read_gauges_from_statsd", lambda ip: {"key": 3})
-    assert utils.get_statsd_gauge_value("1.2.3.4", "key") == 3
-    assert utils.get_statsd_gauge_value("1.2.3.4", "missing") is None
+def test_parse_statsd_dump_keys():
+    dump = "{ 'a.b': 1, 'a.c': [ 1, 2 ], 'd': 'x', 'e': 4 }"
+    assert utils.parse_statsd_dump(dump, keys={"a.c", "e", "missing"}) == {
+        "a.c": [1, 2],
+        "e": 4,
+    }
+    assert utils.parse_statsd_dump(dump, prefix="a.", keys={"a.b", "e"}) == {"a.b": 1}
@@ -1,3 +1,4 @@
+import asyncio
 import importlib.util
 from pathlib import Path
 import sys
@@ -12,13 +13,96 @@ utils = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(utils)
 
 
-def test_discover_device_id_from_statsd(monkeypatch):
-    sample_gauges = {
-        "coral.abc123.water.temperature": 25,
-        "other.metric": 5,
-    }
+def test_state_change_filter_skips_unchanged_values():
+    change_filter = utils.StateChangeFilter()
+    assert change_filter.should_write(1, now=0)
+    assert not change_filter.should_write(1, now=1)
+    assert change_filter.should_write(2, now=2)
+    assert change_filter.should_write(2, {"extra": 1}, now=3)
+    assert not change_filter.should_write(2, {"extra": 1}, now=4)
 
-    monkeypatch.setattr(utils, "read_gauges_from_statsd", lambda ip: sample_gauges)
 
-    device_id = utils.discover_device_id_from_statsd("1.2.3.4")
-    assert device_id == "abc123"
+def test_state_change_filter_deadband_and_heartbeat():
+    change_filter = utils.StateChangeFilter(deadband=0.1, heartbeat=60)
+    assert change_filter.should_write(24.0, now=0)
+    assert not change_filter.should_write(24.05, now=10)
+    # Drift is measured against the last written value
+    assert not change_filter.should_write(23.95, now=20)
+    assert change_filter.should_write(24.1, now=30)
+    assert not change_filter.should_write(24.1, now=60)
+    assert change_filter.should_write(24.1, now=90)
+    assert change_filter.should_write("unknown", now=91)
+
+
+def test_state_change_filter_deadband_boundaries():
+    # Every genuine 0.1 step is written, whatever the float rounding
+    for tenths in range(200, 299):
+        change_filter = utils.StateChangeFilter(deadband=0.1)
+        assert change_filter.should_write(tenths / 10)
+        assert change_filter.should_write((tenths + 1) / 10), tenths
+        assert not change_filter.should_write((tenths + 1) / 10 + 0.05)
+
+    # Whole-percent battery readings: every 1 % step is written
+    change_filter = utils.StateChangeFilter(deadband=1)
+    assert change_filter.should_write(80)
+    assert change_filter.should_write(79)
+    assert not change_filter.should_write(79.5)
+    assert change_filter.should_write(78)
+
+
+class _FakeLoop:
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+
+    def time(self):
+        return self.now
+
+    def call_later(self, delay, callback):
+        timer = types.SimpleNamespace(
+            when=self.now + delay, callback=callback, cancelled=False
+        )
+        timer.cancel = lambda: setattr(timer, "cancelled", True)
+        self.timers.append(timer)
+        return timer
+
+    def advance(self, seconds):
+        self.now += seconds
+        due = [t for t in self.timers if t.when <= self.now and not t.cancelled]
+        self.timers = [t for t in self.timers if t not in due]
+        for timer in due:
+            timer.callback()
+
+
+def test_update_throttle_delivers_leading_and_trailing_values():
+    async def run():
+        loop = _FakeLoop()
+        tasks = []
+        hass = types.SimpleNamespace(loop=loop, async_create_task=tasks.append)
+        delivered = []
+
+        async def deliver(value):
+            delivered.append(value)
+
+        throttle = utils.UpdateThrottle(hass, 30, deliver)
+        await throttle.submit(1)
+        loop.advance(5)
+        await throttle.submit(2)
+        await throttle.submit(3)
+        assert delivered == [1]
+        assert [t.when for t in loop.timers] == [30]
+
+        loop.advance(25)
+        for task in tasks:
+            await task
+        assert delivered == [1, 3]
+
+        # The trailing delivery starts a new interval
+        loop.advance(10)
+        await throttle.submit(4)
+        throttle.cancel()
+        loop.advance(60)
+        await throttle.submit(5)
+        return delivered
+
+    assert asyncio.run(run()) == [1, 3, 5]
@@ -0,0 +1,790 @@
+import os
+import sys
+import types
+import importlib.util
+import asyncio
+import gc
+import json
+
+# Provide dummy aiohttp module before loading utils
+sys.modules["aiohttp"] = types.ModuleType("aiohttp")
+sys.modules["aiohttp"].ClientSession = None
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+utils_path = os.path.join(
+    os.path.dirname(__file__), "..", "custom_components", "coral_mylo", "utils.py"
+)
+spec = importlib.util.spec_from_file_location("utils", utils_path)
+utils = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(utils)
+
+
+class FakeDownloader:
+    def __init__(self):
+        self.calls = 0
+
+    async def async_download(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(0.01)
+        return b"image%d" % call
+
+
+async def settle():
+    """Let the dispatch queue drain and its callbacks run."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def make_client(downloader):
+    hass = types.SimpleNamespace(loop=asyncio.get_running_loop())
+    return utils.MyloWebsocketClient(hass, "dev", "r", "k", downloader=downloader)
+
+
+def test_overlapping_captures_share_one_request():
+    downloader = FakeDownloader()
+
+    async def run():
+        client = make_client(downloader)
+        captures = []
+
+        async def fake_getimage(timeout=30):
+            captures.append(timeout)
+            await asyncio.sleep(0.01)
+            client._img_ready_at = asyncio.get_running_loop().time()
+            return True
+
+        client.send_getimage = fake_getimage
+        results = await asyncio.gather(*(client.async_capture() for _ in range(4)))
+        return captures, results
+
+    captures, results = asyncio.run(run())
+    assert len(captures) == 1
+    assert downloader.calls == 1
+    assert results == [b"image1"] * 4
+
+
+def test_capture_does_not_join_stale_download():
+    downloader = FakeDownloader()
+
+    async def run():
+        client = make_client(downloader)
+        stale = asyncio.ensure_future(client.async_download_snapshot())
+        await settle()
+        client._img_ready_at = asyncio.get_running_loop().time() + 1
+        fresh = await client.async_download_snapshot(not_before=client._img_ready_at)
+        return await stale, fresh
+
+    stale, fresh = asyncio.run(run())
+    assert downloader.calls == 2
+    assert stale == b"image1"
+    assert fresh == b"image2"
+
+
+def test_snapshot_is_current_after_capture_download():
+    async def run():
+        client = make_client(FakeDownloader())
+        before = client.snapshot_is_current()
+        client._resolve_imgready({"time": "1"})
+        stale = client.snapshot_is_current()
+        await client.async_download_snapshot(not_before=client._img_ready_at)
+        current = client.snapshot_is_current()
+        await asyncio.sleep(0.01)
+        # A later push announces an image the last download predates
+        client._resolve_imgready({"time": "2"})
+        return before, stale, current, client.snapshot_is_current()
+
+    assert asyncio.run(run()) == (False, False, True, False)
+
+
+def test_getimage_waits_for_matching_imgready():
+    async def run():
+        client = make_client(FakeDownloader())
+        client._running = True
+        client._connected.set()
+        sent = []
+
+        async def fake_send(text):
+            sent.append(json.loads(text))
+            client._protocol.feed(
+                json.dumps({"t": "d", "d": {"r": sent[-1]["d"]["r"], "b": {"s": "ok"}}})
+            )
+
+        client._protocol = utils.RtdbProtocol(fake_send, client._handle_push)
+        request = asyncio.ensure_future(client.send_getimage(timeout=1))
+        while not sent:
+            await settle()
+        requested = int(sent[0]["d"]["b"]["d"]["time"])
+
+        # The value replayed on subscribe predates the request
+        client._resolve_imgready({"time": str(requested - 5000)})
+        await settle()
+        assert not request.done()
+
+        client._resolve_imgready({"device": "ha", "time": str(requested)})
+        return await request, client._pending_images
+
+    ok, pending = asyncio.run(run())
+    assert ok is True
+    assert pending == {}
+
+
+def test_imgready_time_parsing():
+    assert utils._imgready_time({"time": "1700000000000"}) == 1700000000000
+    assert utils._imgready_time(1700000000000) == 1700000000000
+    assert utils._imgready_time({"device": "ha"}) is None
+    assert utils._imgready_time(True) is None
+
+
+class ProtocolHarness:
+    """Runs an RtdbProtocol against an in-memory socket."""
+
+    def __init__(self):
+        self.sent = []
+        self.pushes = []
+        self.closed = False
+        self.protocol = utils.RtdbProtocol(
+            self.send,
+            lambda action, body: self.pushes.append((action, body)),
+            self.close,
+        )
+
+    async def send(self, text):
+        self.sent.append(text)
+
+    async def close(self):
+        self.closed = True
+
+    def reply(self, status="ok", data=None, index=-1):
+        rid = json.loads(self.sent[index])["d"]["r"]
+        self.protocol.feed(
+            json.dumps({"t": "d", "d": {"r": rid, "b": {"s": status, "d": data}}})
+        )
+
+
+def test_rtdb_requests_are_matched_by_id():
+    async def run():
+        h = ProtocolHarness()
+        first = asyncio.ensure_future(h.protocol.request("auth", {"cred": "jwt"}))
+        second = asyncio.ensure_future(h.protocol.listen("/pooldevices/dev/status"))
+        await settle()
+        h.reply(data="listening", index=1)
+        h.reply(status="permission_denied", index=0)
+        listen = await second
+        try:
+            await first
+        except utils.RtdbError as e:
+            return h, listen, str(e)
+
+    h, tag, error = asyncio.run(run())
+    assert tag is None
+    assert "permission_denied" in error
+    listen = json.loads(h.sent[1])["d"]
+    assert listen["a"] == "q"
+    assert listen["b"] == {"p": "/pooldevices/dev/status", "h": ""}
+
+
+def test_rtdb_query_listens_are_tagged():
+    async def run():
+        h = ProtocolHarness()
+        task = asyncio.ensure_future(h.protocol.listen("/p", query={"l": 1}))
+        await settle()
+        h.reply()
+        return h, await task
+
+    h, tag = asyncio.run(run())
+    assert tag == 1
+    assert json.loads(h.sent[0])["d"]["b"] == {
+        "p": "/p",
+        "h": "",
+        "q": {"l": 1},
+        "t": 1,
+    }
+
+
+def test_rtdb_reassembles_split_messages_and_dispatches_pushes():
+    async def run():
+        h = ProtocolHarness()
+        message = json.dumps(
+            {"t": "d", "d": {"a": "m", "b": {"p": "a/b", "d": {"x": 1}}}}
+        )
+        h.protocol.feed("3")
+        for i in range(0, len(message), len(message) // 3 + 1):
+            h.protocol.feed(message[i : i + len(message) // 3 + 1])
+        h.protocol.feed(
+            json.dumps({"t": "d", "d": {"a": "d", "b": {"p": "c", "d": 2}}})
+        )
+        return h
+
+    h = asyncio.run(run())
+    assert h.pushes == [("m", {"p": "a/b", "d": {"x": 1}}), ("d", {"p": "c", "d": 2})]
+
+
+def test_rtdb_control_frames():
+    async def run():
+        h = ProtocolHarness()
+        h.protocol.feed(
+            json.dumps(
+                {
+                    "t": "c",
+                    "d": {
+                        "t": "h",
+                        "d": {"ts": 1, "v": "5", "h": "s-1.x.com", "s": "sid"},
+                    },
+                }
+            )
+        )
+        h.protocol.feed(json.dumps({"t": "c", "d": {"t": "r", "d": "s-2.x.com"}}))
+        await settle()
+        return h
+
+    h = asyncio.run(run())
+    assert h.protocol.handshake.is_set()
+    assert h.protocol.host == "s-1.x.com"
+    assert h.protocol.session_id == "sid"
+    assert h.protocol.redirect == "s-2.x.com"
+    assert h.closed
+
+
+def test_rtdb_fail_pending_on_close():
+    async def run():
+        h = ProtocolHarness()
+        task = asyncio.ensure_future(h.protocol.request("q", {"p": "/x"}))
+        await settle()
+        h.protocol.fail_pending(ConnectionError("closed"))
+        try:
+            await task
+        except ConnectionError:
+            return True
+
+    assert asyncio.run(run())
+
+
+class FakeWs:
+    """Websocket double that answers every request with ``ok``."""
+
+    def __init__(self, url, script=()):
+        self.url = url
+        self.sent = []
+        self.queue = asyncio.Queue()
+        self.queue.put_nowait(
+            json.dumps({"t": "c", "d": {"t": "h", "d": {"h": "shard.x.com", "s": "s"}}})
+        )
+        self.script = list(script)
+        self.close_code = None
+
+    async def send_str(self, text):
+        self.sent.append(text)
+        if text == "0":
+            return
+        rid = json.loads(text)["d"]["r"]
+        self.queue.put_nowait(
+            json.dumps({"t": "d", "d": {"r": rid, "b": {"s": "ok", "d": {}}}})
+        )
+        if self.script and len(self.sent) == 2:
+            action = self.script.pop(0)
+            if action is None:
+                # Server-initiated clean close
+                self.close_code = 1000
+            self.queue.put_nowait(action)
+
+    async def close(self, code=1000):
+        if self.close_code is None:
+            self.close_code = code
+        self.queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await self.queue.get()
+        if data is None:
+            raise StopAsyncIteration
+        return types.SimpleNamespace(type="text", data=data)
+
+
+class FakeWsSession:
+    def __init__(self, scripts):
+        self.scripts = list(scripts)
+        self.sockets = []
+
+    async def ws_connect(self, url, **kwargs):
+        ws = FakeWs(url, self.scripts.pop(0) if self.scripts else ())
+        self.sockets.append(ws)
+        return ws
+
+
+class FakeTokens:
+    async def async_get_token(self):
+        return "jwt"
+
+    def invalidate(self):
+        pass
+
+
+def test_client_follows_redirect_and_pins_handshake_host(monkeypatch):
+    monkeypatch.setattr(
+        utils,
+        "aiohttp",
+        types.SimpleNamespace(WSMsgType=types.SimpleNamespace(TEXT="text")),
+    )
+    redirect = json.dumps({"t": "c", "d": {"t": "r", "d": "other.x.com"}})
+    session = FakeWsSession([[redirect]])
+
+    async def run():
+        hass = types.SimpleNamespace(
+            loop=asyncio.get_running_loop(),
+            async_create_task=asyncio.get_running_loop().create_task,
+        )
+        client = utils.MyloWebsocketClient(
+            hass, "dev", "r", "k", session=session, tokens=FakeTokens()
+        )
+        await client.start()
+        while len(session.sockets) < 2 or not client._connected.is_set():
+            await asyncio.sleep(0.01)
+        await client.stop()
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    first, second = session.sockets
+    assert first.url.startswith("wss://coralesto.firebaseio.com/")
+    # The redirect was followed immediately instead of after the retry delay
+    assert second.url.startswith("wss://other.x.com/")
+    actions = [json.loads(text)["d"]["a"] for text in second.sent]
+    assert actions == ["auth", "q"]
+
+
+class RecordingBackoff:
+    def __init__(self):
+        self.delays = 0
+        self.resets = 0
+
+    def next_delay(self):
+        self.delays += 1
+        return 0
+
+    def reset(self):
+        self.resets += 1
+
+
+def run_client(session, until):
+    async def run():
+        hass = types.SimpleNamespace(
+            loop=asyncio.get_running_loop(),
+            async_create_task=asyncio.get_running_loop().create_task,
+        )
+        client = utils.MyloWebsocketClient(
+            hass, "dev", "r", "k", session=session, tokens=FakeTokens()
+        )
+        client._backoff = backoff = RecordingBackoff()
+        await client.start()
+        while not until(client):
+            await asyncio.sleep(0.01)
+        await client.stop()
+        return backoff
+
+    return asyncio.run(asyncio.wait_for(run(), 5))
+
+
+def test_client_reconnects_immediately_after_clean_close(monkeypatch):
+    monkeypatch.setattr(
+        utils,
+        "aiohttp",
+        types.SimpleNamespace(WSMsgType=types.SimpleNamespace(TEXT="text")),
+    )
+    monkeypatch.setattr(utils, "RTDB_STABLE_SESSION", 0)
+    session = FakeWsSession([[None]])
+    backoff = run_client(
+        session, lambda c: len(session.sockets) == 2 and c._connected.is_set()
+    )
+    assert backoff.delays == 0
+    assert backoff.resets == 1
+
+
+def test_client_backs_off_after_failures(monkeypatch):
+    class FailingSession:
+        attempts = 0
+
+        async def ws_connect(self, url, **kwargs):
+            self.attempts += 1
+            raise OSError("unreachable")
+
+    session = FailingSession()
+    backoff = run_client(session, lambda c: session.attempts >= 3)
+    assert backoff.delays >= 2
+    assert backoff.resets == 0
+
+
+def test_client_falls_back_to_default_host_when_shard_fails(monkeypatch):
+    monkeypatch.setattr(
+        utils,
+        "aiohttp",
+        types.SimpleNamespace(WSMsgType=types.SimpleNamespace(TEXT="text")),
+    )
+
+    class ShardDownSession(FakeWsSession):
+        def __init__(self):
+            # The first session pins shard.x.com, then the server hangs up
+            super().__init__([[None], [None]])
+            self.urls = []
+
+        async def ws_connect(self, url, **kwargs):
+            self.urls.append(url)
+            if "shard.x.com" in url:
+                raise OSError("name not resolved")
+            return await super().ws_connect(url, **kwargs)
+
+    session = ShardDownSession()
+    run_client(session, lambda c: len(session.urls) >= 4)
+    hosts = [url.split("/")[2] for url in session.urls[:4]]
+    assert hosts == [
+        "coralesto.firebaseio.com",
+        "shard.x.com",
+        "coralesto.firebaseio.com",
+        "shard.x.com",
+    ]
+
+
+def test_client_backs_off_after_too_many_redirects(monkeypatch):
+    monkeypatch.setattr(
+        utils,
+        "aiohttp",
+        types.SimpleNamespace(WSMsgType=types.SimpleNamespace(TEXT="text")),
+    )
+    monkeypatch.setattr(utils, "RTDB_MAX_REDIRECTS", 2)
+
+    class RedirectingWs(FakeWs):
+        def __init__(self, url, script=()):
+            super().__init__(url, script)
+            self.queue = asyncio.Queue()
+            self.queue.put_nowait(
+                json.dumps({"t": "c", "d": {"t": "r", "d": "loop.x.com"}})
+            )
+
+    class RedirectingSession(FakeWsSession):
+        async def ws_connect(self, url, **kwargs):
+            ws = RedirectingWs(url)
+            self.sockets.append(ws)
+            return ws
+
+    session = RedirectingSession([])
+    backoff = run_client(session, lambda c: len(session.sockets) >= 4)
+    hosts = [ws.url.split("/")[2] for ws in session.sockets[:4]]
+    assert hosts == [
+        "coralesto.firebaseio.com",
+        "loop.x.com",
+        "loop.x.com",
+        "coralesto.firebaseio.com",
+    ]
+    assert backoff.delays >= 1
+
+
+def test_backoff_jitter_stays_within_range():
+    backoff = utils.ExponentialBackoff(initial=10, maximum=100, jitter=0.5)
+    for expected in (10, 20, 40, 80, 100, 100):
+        delay = backoff.next_delay()
+        assert expected * 0.5 <= delay <= expected
+
+
+def test_path_trie_deliveries_and_removal():
+    trie = utils.PathTrie()
+    trie.set("/dev/status/battery", "battery")
+    trie.set("/dev/status/temperature/cpu", "cpu")
+    trie.set("/dev/imgready", "img")
+
+    update = {"battery": 80, "temperature": {"cpu": 50}}
+    found = sorted(trie.deliveries(["dev", "status"], update))
+    assert found == [
+        ("/dev/status/battery", "battery", 80),
+        ("/dev/status/temperature/cpu", "cpu", 50),
+    ]
+    # A set that omits a child reports it as deleted
+    assert list(trie.deliveries(["dev", "status", "temperature"], {})) == [
+        ("/dev/status/temperature/cpu", "cpu", None)
+    ]
+    assert list(trie.deliveries(["other"], 1)) == []
+
+    trie.remove("/dev/status/temperature/cpu")
+    assert "/dev/status/temperature/cpu" not in trie
+    assert sorted(path for path, _ in trie) == ["/dev/imgready", "/dev/status/battery"]
+
+
+def test_expand_merge_push():
+    assert utils.expand_push(
+        "m", "dev/status", {"battery": 1, "temperature/cpu": 2}
+    ) == [
+        (["dev", "status", "battery"], 1),
+        (["dev", "status", "temperature", "cpu"], 2),
+    ]
+    assert utils.expand_push("d", "/dev/x", 3) == [(["dev", "x"], 3)]
+
+
+def test_client_listens_once_per_subtree_and_routes_merges():
+    async def run():
+        loop = asyncio.get_running_loop()
+        hass = types.SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        client = utils.MyloWebsocketClient(hass, "dev", "r", "k")
+        received = []
+
+        def recorder(name):
+            async def cb(value):
+                received.append((name, value))
+
+            return cb
+
+        for path in ("status/battery", "status/temperature/cpu", "state_log"):
+            client.register_sensor(f"/pooldevices/dev/{path}", recorder(path))
+        listens = client._listen_paths()
+
+        client._handle_push(
+            "m", {"p": "pooldevices/dev/status", "d": {"battery": 70, "wifi": 1}}
+        )
+        client._handle_push(
+            "d", {"p": "pooldevices/dev/status", "d": {"temperature": {"cpu": 40}}}
+        )
+        await settle()
+        return listens, sorted(received, key=str)
+
+    listens, received = asyncio.run(run())
+    assert listens == [
+        "/pooldevices/dev/imgready",
+        "/pooldevices/dev/state_log",
+        "/pooldevices/dev/status",
+    ]
+    # Both pushes land in one loop iteration and coalesce per path
+    assert received == [
+        ("status/battery", None),
+        ("status/temperature/cpu", 40),
+    ]
+
+
+def test_mirror_applies_sets_and_deletes():
+    mirror = utils.RtdbMirror()
+    mirror.set("/dev/status", {"battery": 80, "temperature": {"cpu": 50}})
+    mirror.set(["dev", "status", "temperature", "gpu"], 45)
+    assert mirror.get("/dev/status/temperature") == {"cpu": 50, "gpu": 45}
+
+    mirror.set("/dev/status/temperature/cpu", None)
+    mirror.set("/dev/status/temperature/gpu", None)
+    # Emptied parents disappear, as in Firebase
+    assert mirror.get("/dev/status") == {"battery": 80}
+    assert mirror.get("/dev/missing/deeper") is None
+
+    mirror.set("/dev/log", ["a", "b"])
+    mirror.set("/dev/log/2", "c")
+    assert mirror.get("/dev/log") == {"0": "a", "1": "b", "2": "c"}
+
+
+def test_client_mirror_delivers_changes_only():
+    async def run():
+        loop = asyncio.get_running_loop()
+        hass = types.SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        client = utils.MyloWebsocketClient(hass, "dev", "r", "k")
+        received = []
+
+        def recorder(name):
+            async def cb(value):
+                received.append((name, value))
+
+            return cb
+
+        client.register_sensor("/pooldevices/dev/status/battery", recorder("battery"))
+        client.register_sensor("/pooldevices/dev/state_log", recorder("log"))
+        status = {"battery": 70, "wifi": 1}
+        client._handle_push("d", {"p": "pooldevices/dev/status", "d": status})
+        # A replay after reconnect and an unrelated sibling change stay silent
+        client._handle_push("d", {"p": "pooldevices/dev/status", "d": dict(status)})
+        client._handle_push("m", {"p": "pooldevices/dev/status", "d": {"wifi": 2}})
+        # A child added under a registered path reaches it with the full value
+        client._handle_push(
+            "d", {"p": "pooldevices/dev/state_log/k1", "d": {"state": 1}}
+        )
+        await settle()
+
+        late = []
+
+        async def late_cb(value):
+            late.append(value)
+
+        client.register_sensor("/pooldevices/dev/status/wifi", late_cb)
+        await settle()
+        return received, late, client.get("/pooldevices/dev/status")
+
+    received, late, status = asyncio.run(run())
+    assert received == [("battery", 70), ("log", {"k1": {"state": 1}})]
+    assert late == [2]
+    assert status == {"battery": 70, "wifi": 2}
+
+
+def test_subscribers_share_a_path_and_listen_live():
+    async def run():
+        loop = asyncio.get_running_loop()
+        hass = types.SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        client = utils.MyloWebsocketClient(hass, "dev", "r", "k")
+        harness = ProtocolHarness()
+        client._protocol = harness.protocol
+        client._connected.set()
+        received = []
+
+        def recorder(name):
+            async def cb(value):
+                received.append((name, value))
+
+            return cb
+
+        unsub_a = client.subscribe("/pooldevices/dev/state_log", recorder("a"))
+        unsub_b = client.subscribe("/pooldevices/dev/state_log", recorder("b"))
+        await settle()
+        listens = [json.loads(text)["d"] for text in harness.sent]
+        harness.reply()
+
+        client._handle_push("d", {"p": "pooldevices/dev/state_log", "d": {"k": 1}})
+        await settle()
+        unsub_a()
+        # Unsubscribing twice is harmless
+        unsub_a()
+        client._handle_push("d", {"p": "pooldevices/dev/state_log", "d": {"k": 2}})
+        await settle()
+        still_listening = len(harness.sent) == 1
+
+        unsub_b()
+        await settle()
+        unlisten = json.loads(harness.sent[-1])["d"]
+        harness.reply()
+        await settle()
+        return (
+            listens,
+            sorted(received, key=str),
+            still_listening,
+            unlisten,
+            client._listen_paths(),
+            client.get("/pooldevices/dev/state_log"),
+        )
+
+    listens, received, still_listening, unlisten, paths, mirrored = asyncio.run(run())
+    assert [(d["a"], d["b"]["p"]) for d in listens] == [
+        ("q", "/pooldevices/dev/state_log")
+    ]
+    assert received == [("a", {"k": 1}), ("b", {"k": 1}), ("b", {"k": 2})]
+    assert still_listening
+    assert (unlisten["a"], unlisten["b"]["p"]) == ("n", "/pooldevices/dev/state_log")
+    assert paths == ["/pooldevices/dev/imgready"]
+    assert mirrored is None
+
+
+def test_subtree_listen_outlives_single_subscriber():
+    async def run():
+        loop = asyncio.get_running_loop()
+        hass = types.SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        client = utils.MyloWebsocketClient(hass, "dev", "r", "k")
+
+        async def noop(value):
+            pass
+
+        unsub = client.subscribe("/pooldevices/dev/status/battery", noop)
+        client.subscribe("/pooldevices/dev/status/wifi", noop)
+        unsub()
+        return client._listen_paths()
+
+    assert asyncio.run(run()) == [
+        "/pooldevices/dev/imgready",
+        "/pooldevices/dev/status",
+    ]
+
+
+def test_dispatch_queue_coalesces_and_batches():
+    async def run():
+        loop = asyncio.get_running_loop()
+        tasks = []
+
+        def create_task(coro):
+            tasks.append(coro)
+            return loop.create_task(coro)
+
+        hass = types.SimpleNamespace(loop=loop, async_create_task=create_task)
+        queue = utils.DispatchQueue(hass, maxsize=2)
+        received = []
+
+        def recorder(name):
+            async def cb(value):
+                received.append((name, value))
+
+            return cb
+
+        a, b, c = recorder("a"), recorder("b"), recorder("c")
+        for value in range(100):
+            queue.put("a", a, value)
+        queue.put("b", b, "x")
+        queue.put("gone", a, "z")
+        queue.discard("gone")
+        queue.put("c", c, "y")
+        await settle()
+        return received, len(tasks), queue.dropped, len(queue)
+
+    received, tasks, dropped, pending = asyncio.run(run())
+    # "a" was the oldest key when the bound was exceeded
+    assert received == [("b", "x"), ("c", "y")]
+    assert tasks == 1
+    assert dropped == 1
+    assert pending == 0
+
+
+def test_dispatch_queue_survives_failing_callback():
+    async def run():
+        loop = asyncio.get_running_loop()
+        hass = types.SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        queue = utils.DispatchQueue(hass)
+        received = []
+
+        async def broken(value):
+            raise ValueError(value)
+
+        async def ok(value):
+            received.append(value)
+
+        queue.put("broken", broken, 1)
+        queue.put("ok", ok, 2)
+        await settle()
+        return received
+
+    assert asyncio.run(run()) == [2]
+
+
+def test_failed_keepalive_exception_is_retrieved(monkeypatch):
+    monkeypatch.setattr(
+        utils,
+        "aiohttp",
+        types.SimpleNamespace(WSMsgType=types.SimpleNamespace(TEXT="text")),
+    )
+    monkeypatch.setattr(utils, "RTDB_KEEPALIVE", 0)
+
+    class DeadKeepaliveWs(FakeWs):
+        async def send_str(self, text):
+            if text == "0":
+                raise ConnectionResetError("keepalive failed")
+            await super().send_str(text)
+
+    class Session(FakeWsSession):
+        async def ws_connect(self, url, **kwargs):
+            ws = DeadKeepaliveWs(url)
+            self.sockets.append(ws)
+            return ws
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        errors = []
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+        hass = types.SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+        client = utils.MyloWebsocketClient(
+            hass, "dev", "r", "k", session=Session([]), tokens=FakeTokens()
+        )
+        await client.start()
+        while not client._connected.is_set():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        await client.stop()
+        gc.collect()
+        await settle()
+        return errors
+
+    assert asyncio.run(asyncio.wait_for(run(), 5)) == []